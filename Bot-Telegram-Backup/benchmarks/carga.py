@@ -0,0 +1,172 @@
+"""
+Teste de carga do bot, sem rede: a planilha e o Telegram são substituídos por versões falsas
+
+Uso (a partir da pasta Bot-Telegram-Backup):
+    python -m benchmarks.carga --jogadores 500 --monitores 10 --comandos 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.falsos import PlanilhaFalsa, TelegramFalso, instalar
+from benchmarks.gerador import GeradorComandos
+
+
+def percentis(duracoes):
+    """p50, p95, p99 e máximo (em milissegundos) de uma lista de durações em segundos"""
+    if not duracoes:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordenadas = sorted(duracoes)
+
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+
+    return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": ordenadas[-1] * 1000}
+
+
+def configurar_ambiente(args, pasta):
+    """Variáveis lidas pelo bot; tudo que ele grava em disco vai para uma pasta temporária"""
+    os.environ.update({
+        "API_KEY_TELEGRAM": "0:benchmark",
+        "LINK_GOOGLE_SHEET_PONTUACAO": "planilha-falsa",
+        "ARQUIVO_DIARIO": str(Path(pasta) / "diario_escritas.jsonl"),
+        "ARQUIVO_SNAPSHOT": str(Path(pasta) / "snapshot_planilha.pkl"),
+        "ARQUIVO_HISTORICO": str(Path(pasta) / "historico.sqlite3"),
+        # Arquivo inexistente: um único evento, com a planilha falsa, mesmo que haja um lib/eventos.json
+        "ARQUIVO_EVENTOS": str(Path(pasta) / "eventos.json"),
+        "TTL_CACHE_PLANILHA": str(args.ttl),
+        "INTERVALO_FILA_ESCRITA": str(args.intervalo_fila),
+        "COTA_LEITURAS_MINUTO": str(args.cota_leituras),
+        "COTA_ESCRITAS_MINUTO": str(args.cota_escritas),
+        "NUM_WORKERS": str(args.workers),
+    })
+
+
+def executar(args):
+    aba = PlanilhaFalsa(
+        jogadores=args.jogadores,
+        latencia_leitura=args.latencia_leitura,
+        latencia_escrita=args.latencia_escrita,
+        taxa_erro_cota=args.taxa_erro_cota,
+        semente=args.semente,
+    )
+    instalar(aba)
+
+    from src.modules.metricas import metricas
+    from src.modules.telegram import TelegramBot
+
+    inicio_carga = time.perf_counter()
+    bot = TelegramBot()
+    telegram = TelegramFalso(latencia=args.latencia_telegram)
+    bot.bot.reply_to = telegram.reply_to
+    tempo_inicio = time.perf_counter() - inicio_carga
+
+    gerador = GeradorComandos(args.jogadores, args.monitores, semente=args.semente)
+    enviados = {}  # message_id -> (tipo, momento do recebimento)
+    intervalo = 1 / args.taxa if args.taxa > 0 else 0
+
+    inicio = time.perf_counter()
+    for tipo, mensagem in gerador.gerar(args.comandos):
+        enviados[mensagem.message_id] = (tipo, time.perf_counter())
+        # Mesmo caminho do polling: os handlers registrados recebem a mensagem e a enviam ao pool
+        bot.bot.process_new_messages([mensagem])
+        if intervalo:
+            time.sleep(intervalo)
+    bot.despachante.encerrar()
+    fim_comandos = time.perf_counter()
+    bot.eventos.encerrar()
+    fim = time.perf_counter()
+
+    latencias = {}
+    for message_id, (tipo, recebido) in enviados.items():
+        if message_id in telegram.respostas:
+            latencias.setdefault(tipo, []).append(telegram.respostas[message_id][1] - recebido)
+
+    operacoes, contadores = metricas.resumo()
+    return {
+        "parametros": vars(args),
+        "inicio_bot_s": tempo_inicio,
+        "duracao_s": fim_comandos - inicio,
+        "duracao_com_envio_final_s": fim - inicio,
+        "vazao_comandos_s": len(enviados) / (fim_comandos - inicio),
+        "sem_resposta": len(enviados) - len(telegram.respostas),
+        "latencia_ms": {tipo: {"quantidade": len(d), **percentis(d)} for tipo, d in sorted(latencias.items())},
+        "operacoes_ms": {
+            nome: {
+                "quantidade": o["quantidade"],
+                "erros": o["erros"],
+                "p50": o["p50"] * 1000,
+                "p95": o["p95"] * 1000,
+                "p99": o["p99"] * 1000,
+            }
+            for nome, o in sorted(operacoes.items())
+        },
+        "contadores": contadores,
+        "chamadas_api": dict(sorted(aba.chamadas.items())),
+        "erros_cota_injetados": aba.erros_cota,
+        "linhas_planilha": len(aba.valores),
+    }
+
+
+def imprimir(relatorio):
+    print(f"\n=== Teste de carga: {relatorio['parametros']['comandos']} comandos, "
+          f"{relatorio['parametros']['jogadores']} jogadores, {relatorio['parametros']['monitores']} monitores ===")
+    print(f"Início do bot: {relatorio['inicio_bot_s']:.2f}s")
+    print(f"Duração: {relatorio['duracao_s']:.2f}s (+ envio final: {relatorio['duracao_com_envio_final_s']:.2f}s)")
+    print(f"Vazão: {relatorio['vazao_comandos_s']:.1f} comandos/s | sem resposta: {relatorio['sem_resposta']}")
+
+    print("\nLatência ponta a ponta (recebimento -> resposta), em ms:")
+    print(f"  {'comando':<12}{'qtd':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for tipo, l in relatorio["latencia_ms"].items():
+        print(f"  {tipo:<12}{l['quantidade']:>7}{l['p50']:>10.1f}{l['p95']:>10.1f}{l['p99']:>10.1f}{l['max']:>10.1f}")
+
+    print("\nOperações medidas pelo bot, em ms:")
+    print(f"  {'operação':<28}{'qtd':>7}{'erros':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for nome, o in relatorio["operacoes_ms"].items():
+        print(f"  {nome:<28}{o['quantidade']:>7}{o['erros']:>7}{o['p50']:>10.1f}{o['p95']:>10.1f}{o['p99']:>10.1f}")
+
+    print("\nChamadas à API do Sheets (incluindo as que falharam):")
+    for nome, quantidade in relatorio["chamadas_api"].items():
+        print(f"  {nome:<20}{quantidade:>7}")
+    print(f"  erros 429 injetados: {relatorio['erros_cota_injetados']}")
+    for nome, valor in sorted(relatorio["contadores"].items()):
+        print(f"  {nome:<28}{valor:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do bot com planilha e Telegram falsos")
+    parser.add_argument("--jogadores", type=int, default=500, help="jogadores já cadastrados na planilha")
+    parser.add_argument("--monitores", type=int, default=10, help="monitores enviando comandos")
+    parser.add_argument("--comandos", type=int, default=1000, help="quantidade de comandos enviados")
+    parser.add_argument("--taxa", type=float, default=0, help="comandos por segundo (0 = o mais rápido possível)")
+    parser.add_argument("--workers", type=int, default=4, help="threads do pool de comandos (NUM_WORKERS)")
+    parser.add_argument("--latencia-leitura", type=float, default=0.15, help="segundos por leitura da planilha")
+    parser.add_argument("--latencia-escrita", type=float, default=0.2, help="segundos por escrita na planilha")
+    parser.add_argument("--latencia-telegram", type=float, default=0.05, help="segundos por resposta enviada")
+    parser.add_argument("--taxa-erro-cota", type=float, default=0.0, help="probabilidade de uma chamada falhar com 429")
+    parser.add_argument("--ttl", type=float, default=60, help="TTL_CACHE_PLANILHA")
+    parser.add_argument("--intervalo-fila", type=float, default=2, help="INTERVALO_FILA_ESCRITA")
+    parser.add_argument("--cota-leituras", type=int, default=60, help="COTA_LEITURAS_MINUTO")
+    parser.add_argument("--cota-escritas", type=int, default=60, help="COTA_ESCRITAS_MINUTO")
+    parser.add_argument("--semente", type=int, default=42, help="semente dos geradores aleatórios")
+    parser.add_argument("--saida", help="grava o relatório completo em JSON neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        configurar_ambiente(args, pasta)
+        relatorio = executar(args)
+
+    imprimir(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            json.dump(relatorio, saida, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
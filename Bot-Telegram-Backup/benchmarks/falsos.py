@@ -0,0 +1,196 @@
+import json
+import random
+import threading
+import time
+
+import gspread
+import requests
+from gspread.utils import a1_to_rowcol, numericise_all, rowcol_to_a1, to_records
+
+##########################################################
+# PLANILHA E CLIENTE GSPREAD FALSOS, PARA TESTES DE CARGA #
+##########################################################
+
+CABECALHO = ["Id", "Nome", "Contato (telegram/numero)"] + [
+    f"{tipo} ({jogo})"
+    for jogo in ["Touhou", "Guitar Hero", "Chicken", "Tetris"]
+    for tipo in ["Pontuação", "Timestamp"]
+]
+
+
+def erro_cota():
+    """Cria o mesmo erro que o gspread levanta quando a cota por minuto é estourada (429)"""
+    resposta = requests.Response()
+    resposta.status_code = 429
+    resposta._content = json.dumps({
+        "error": {"code": 429, "message": "Quota exceeded (planilha falsa)", "status": "RESOURCE_EXHAUSTED"}
+    }).encode()
+    return gspread.exceptions.APIError(resposta)
+
+
+class PlanilhaFalsa:
+    def __init__(self, jogadores=500, latencia_leitura=0.15, latencia_escrita=0.2, taxa_erro_cota=0.0, semente=None):
+        """
+        Imita em memória a aba "Pessoas" de um gspread.Worksheet
+
+        Argumentos:
+            jogadores (int): quantidade de jogadores já cadastrados
+            latencia_leitura (float): tempo (em segundos) de cada leitura
+            latencia_escrita (float): tempo (em segundos) de cada escrita
+            taxa_erro_cota (float): probabilidade (0 a 1) de uma chamada falhar com 429
+            semente (int): semente do gerador aleatório, para execuções reproduzíveis
+
+        Observação:
+            - Implementa as chamadas usadas pelo bot (get_all_values, get_values, batch_get,
+            row_values, col_values, batch_update, append_rows) e as do código antigo (get_all_records,
+            update_cell, append_row)
+            - Cada chamada é contada em `chamadas`, inclusive as que falharam
+        """
+        self.title = "Pessoas"
+        self.latencia_leitura = latencia_leitura
+        self.latencia_escrita = latencia_escrita
+        self.taxa_erro_cota = taxa_erro_cota
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+        self.chamadas = {}
+        self.erros_cota = 0
+        self.valores = [CABECALHO[:]]
+        for i in range(1, jogadores + 1):
+            linha = [str(i), f"Jogador {i}", f"@jogador{i}"] + [""] * (len(CABECALHO) - 3)
+            self.valores.append(linha)
+
+    def _chamar(self, nome, latencia):
+        with self._trava:
+            self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+            falhar = self._aleatorio.random() < self.taxa_erro_cota
+            if falhar:
+                self.erros_cota += 1
+        time.sleep(latencia)
+        if falhar:
+            raise erro_cota()
+
+    def _copia(self, inicio=0):
+        with self._trava:
+            return [linha[:] for linha in self.valores[inicio:]]
+
+    def _definir(self, linha, coluna, valor):
+        while len(self.valores) < linha:
+            self.valores.append([""] * len(CABECALHO))
+        self.valores[linha - 1][coluna - 1] = str(valor)
+
+    def get_all_values(self, *args, **kwargs):
+        self._chamar("get_all_values", self.latencia_leitura)
+        return self._copia()
+
+    def get_all_records(self, *args, **kwargs):
+        self._chamar("get_all_records", self.latencia_leitura)
+        valores = self._copia()
+        return to_records(valores[0], [numericise_all(linha) for linha in valores[1:]])
+
+    def get_values(self, range_name=None, *args, **kwargs):
+        """Aceita intervalos no formato "A2:K" (a partir de uma linha até o fim)"""
+        self._chamar("get_values", self.latencia_leitura)
+        if not range_name:
+            return self._copia()
+        linha, _ = a1_to_rowcol(range_name.split(":")[0])
+        return self._copia(linha - 1)
+
+    def batch_get(self, ranges, *args, **kwargs):
+        """Aceita intervalos no formato "A2:K" ou "A2:A" (a partir de uma linha até o fim), em uma única chamada"""
+        self._chamar("batch_get", self.latencia_leitura)
+        resultado = []
+        for intervalo in ranges:
+            inicio, fim = intervalo.split(":")
+            linha, coluna = a1_to_rowcol(inicio)
+            _, ultima = a1_to_rowcol(f"{fim}1")
+            resultado.append([valores[coluna - 1:ultima] for valores in self._copia(linha - 1)])
+        return resultado
+
+    def row_values(self, row, *args, **kwargs):
+        self._chamar("row_values", self.latencia_leitura)
+        with self._trava:
+            return self.valores[row - 1][:] if row <= len(self.valores) else []
+
+    def col_values(self, col, *args, **kwargs):
+        self._chamar("col_values", self.latencia_leitura)
+        with self._trava:
+            return [linha[col - 1] for linha in self.valores]
+
+    def update_cell(self, row, col, value):
+        self._chamar("update_cell", self.latencia_escrita)
+        with self._trava:
+            self._definir(row, col, value)
+
+    def batch_update(self, data, **kwargs):
+        self._chamar("batch_update", self.latencia_escrita)
+        with self._trava:
+            for item in data:
+                linha, coluna = a1_to_rowcol(item["range"])
+                self._definir(linha, coluna, item["values"][0][0])
+
+    def append_row(self, values, **kwargs):
+        self._chamar("append_row", self.latencia_escrita)
+        with self._trava:
+            self.valores.append([str(v) for v in values])
+
+    def append_rows(self, values, **kwargs):
+        self._chamar("append_rows", self.latencia_escrita)
+        with self._trava:
+            primeira = len(self.valores) + 1
+            self.valores.extend([str(v) for v in linha] for linha in values)
+            ultima = len(self.valores)
+        # Mesmo formato da resposta da API, que informa onde as linhas foram parar
+        largura = max((len(linha) for linha in values), default=1)
+        return {"updates": {"updatedRange": f"{self.title}!A{primeira}:{rowcol_to_a1(ultima, largura)}"}}
+
+
+class _PlanilhaFalsaAberta:
+    def __init__(self, aba):
+        self.aba = aba
+
+    def worksheet(self, nome):
+        if nome == "Historico":
+            # Aba separada, para que o histórico não se misture aos jogadores
+            if getattr(self.aba, "historico", None) is None:
+                self.aba.historico = PlanilhaFalsa(0, self.aba.latencia_leitura, self.aba.latencia_escrita)
+                self.aba.historico.title = nome
+            return self.aba.historico
+        return self.aba
+
+    def worksheets(self):
+        return [self.aba]
+
+
+class ClienteGspreadFalso:
+    def __init__(self, aba):
+        """Substitui o cliente autenticado do gspread, devolvendo sempre a mesma aba falsa"""
+        self.aba = aba
+
+    def set_timeout(self, timeout):
+        pass
+
+    def open_by_key(self, chave):
+        return _PlanilhaFalsaAberta(self.aba)
+
+
+def instalar(aba):
+    """Faz o gspread.service_account (usado pelo ClienteSheets) devolver o cliente falso"""
+    gspread.service_account = lambda *args, **kwargs: ClienteGspreadFalso(aba)
+
+
+class TelegramFalso:
+    def __init__(self, latencia=0.05):
+        """
+        Substitui o envio de respostas do TeleBot, registrando quando cada mensagem foi respondida
+
+        Argumentos:
+            latencia (float): tempo (em segundos) de cada envio ao Telegram
+        """
+        self.latencia = latencia
+        self._trava = threading.Lock()
+        self.respostas = {}  # message_id -> (texto, momento da resposta)
+
+    def reply_to(self, message, text, **kwargs):
+        time.sleep(self.latencia)
+        with self._trava:
+            self.respostas[message.message_id] = (text, time.perf_counter())
@@ -0,0 +1,103 @@
+import random
+import string
+import time
+
+from telebot import types
+
+##########################################################
+# GERADOR DE COMANDOS SINTÉTICOS PARA TESTES DE CARGA    #
+##########################################################
+
+JOGOS = ["Touhou", "Guitar Hero", "Chicken", "Tetris"]
+
+# Proporção padrão de cada tipo de comando em uma Game Night
+MISTURA_PADRAO = {
+    "add_id": 0.55,
+    "add_novo": 0.10,
+    "add_lote": 0.05,
+    "ajuste": 0.05,
+    "busca": 0.20,
+    "ranking": 0.05,
+}
+
+
+class GeradorComandos:
+    def __init__(self, jogadores=500, monitores=10, mistura=None, semente=None, chat_id=-1001):
+        """
+        Gera mensagens do Telegram como as enviadas pelos monitores durante o evento
+
+        Argumentos:
+            jogadores (int): quantidade de jogadores já cadastrados na planilha (ids 1..jogadores)
+            monitores (int): quantidade de monitores enviando comandos
+            mistura (dict): tipo de comando -> proporção (ver MISTURA_PADRAO)
+            semente (int): semente do gerador aleatório, para execuções reproduzíveis
+            chat_id (int): id do grupo (fórum) onde as mensagens são enviadas
+        """
+        self.jogadores = jogadores
+        self.monitores = [f"monitor{i}" for i in range(1, monitores + 1)]
+        self.mistura = mistura or MISTURA_PADRAO
+        self.chat_id = chat_id
+        self._aleatorio = random.Random(semente)
+        self._proxima_mensagem = 1
+        self._novos = 0
+
+    def _mensagem(self, texto, jogo, monitor):
+        comando = texto.split()[0]
+        dados = {
+            "message_id": self._proxima_mensagem,
+            "date": int(time.time()),
+            "chat": {"id": self.chat_id, "type": "supergroup", "title": "Game Night", "is_forum": True},
+            "from": {"id": 1000 + self.monitores.index(monitor), "is_bot": False,
+                     "first_name": monitor, "username": monitor},
+            "text": texto,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(comando)}],
+            "message_thread_id": 1 + JOGOS.index(jogo),
+            "reply_to_message": {
+                "message_id": 1 + JOGOS.index(jogo),
+                "date": 0,
+                "chat": {"id": self.chat_id, "type": "supergroup"},
+                "forum_topic_created": {"name": jogo, "icon_color": 0},
+            },
+        }
+        self._proxima_mensagem += 1
+        return types.Message.de_json(dados)
+
+    def _registro(self, tipo):
+        aleatorio = self._aleatorio
+        if tipo == "add_novo":
+            # Nomes aleatórios, para não caírem no aviso de possível duplicado
+            nome = " ".join(
+                "".join(aleatorio.choice(string.ascii_lowercase) for _ in range(aleatorio.randint(4, 8))).title()
+                for _ in range(2)
+            )
+            self._novos += 1
+            return f"{nome}, @{nome.replace(' ', '').lower()}, {aleatorio.randint(0, 10000)}"
+        return f"{aleatorio.randint(1, self.jogadores)}, {aleatorio.randint(0, 10000)}"
+
+    def proximo(self):
+        """
+        Returns:
+            tuple: (tipo do comando, telebot.types.Message)
+        """
+        aleatorio = self._aleatorio
+        tipo = aleatorio.choices(list(self.mistura), weights=list(self.mistura.values()))[0]
+        jogo = aleatorio.choice(JOGOS)
+        monitor = aleatorio.choice(self.monitores)
+
+        if tipo in ("add_id", "add_novo"):
+            texto = f"/add {self._registro(tipo)}"
+        elif tipo == "add_lote":
+            registros = [self._registro("add_id") for _ in range(aleatorio.randint(3, 10))]
+            texto = "/add\n" + "\n".join(registros)
+        elif tipo == "ajuste":
+            texto = f"/ajuste {self._registro('add_id')}"
+        elif tipo == "busca":
+            texto = f"/busca {aleatorio.randint(1, self.jogadores)}"
+        else:
+            texto = f"/ranking {jogo} 10"
+        return tipo, self._mensagem(texto, jogo, monitor)
+
+    def gerar(self, quantidade):
+        """Gera `quantidade` comandos"""
+        for _ in range(quantidade):
+            yield self.proximo()
@@ -1,4 +1,18 @@
-from src.modules.telegram import TelegramBot
+import os
+from pathlib import Path
+from dotenv import load_dotenv
 
-bot = TelegramBot()
+# MODO_BOT=async troca para a versão asyncio do bot e MODO_BOT=webhook para o modo webhook
+# (mesmos comandos e respostas)
+load_dotenv(Path(__file__).parent / "lib" / ".env")
+
+modo = os.getenv("MODO_BOT", "").lower()
+if modo == "async":
+    from src.modules.telegram_async import TelegramBotAsync as Bot
+elif modo == "webhook":
+    from src.modules.telegram_webhook import TelegramBotWebhook as Bot
+else:
+    from src.modules.telegram import TelegramBot as Bot
+
+bot = Bot()
 bot.start()
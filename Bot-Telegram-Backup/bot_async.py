@@ -0,0 +1,4 @@
+from src.modules.telegram_async import TelegramBotAsync
+
+bot = TelegramBotAsync()
+bot.start()
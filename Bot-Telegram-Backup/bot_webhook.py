@@ -0,0 +1,4 @@
+from src.modules.telegram_webhook import TelegramBotWebhook
+
+bot = TelegramBotWebhook()
+bot.start()
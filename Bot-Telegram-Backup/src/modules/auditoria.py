@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+
+##########################################################
+# HISTÓRICO (AUDITORIA) DAS TENTATIVAS DE PONTUAÇÃO      #
+##########################################################
+
+# Colunas da aba "Historico", na ordem em que as tentativas são enviadas
+CABECALHO_HISTORICO = [
+    "Data/Hora", "Id", "Nome", "Jogo", "Pontos antigos", "Pontos novos",
+    "Monitor", "Mensagem", "Comando", "Situação",
+]
+
+_CAMPOS = [
+    "horario", "jogador_id", "nome", "jogo", "pontos_antigos", "pontos_novos",
+    "monitor", "mensagem_id", "comando", "situacao",
+]
+
+
+class Auditoria:
+    def __init__(self, caminho, aba=None, intervalo=30.0, lote=500, automatica=True):
+        """
+        Registra cada tentativa de pontuação em um banco SQLite local e a envia, em lotes, para a aba "Historico"
+
+        Argumentos:
+            caminho (str): arquivo do banco SQLite
+            aba (callable): função que retorna a aba "Historico" (chamada só na hora de enviar)
+            intervalo (float): segundos entre os envios para a planilha
+            lote (int): quantidade máxima de tentativas enviadas em um único append_rows
+            automatica (bool): quando False, não há envio em segundo plano (ver enviar())
+
+        Observação:
+            - Registrar é só um INSERT local (WAL, sem fsync a cada commit), então o comando não
+            espera a planilha; as consultas do /historico também são respondidas pelo banco local
+            - Cada tentativa fica marcada como enviada só depois que o append_rows dá certo, então
+            nada se perde se a planilha estiver fora ou o bot cair; o pior caso é uma tentativa
+            repetida na aba, se o bot cair logo depois do envio
+        """
+        self.aba = aba
+        self.intervalo = intervalo
+        self.lote = lote
+        self._trava = threading.Lock()
+        self._trava_envio = threading.Lock()
+        self._conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS historico (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                horario TEXT,
+                jogador_id TEXT,
+                nome TEXT,
+                jogo TEXT,
+                pontos_antigos REAL,
+                pontos_novos REAL,
+                monitor TEXT,
+                mensagem_id INTEGER,
+                comando TEXT,
+                situacao TEXT,
+                enviado INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS historico_jogador ON historico (jogador_id, jogo, seq);
+            CREATE INDEX IF NOT EXISTS historico_pendentes ON historico (enviado, seq);
+            """
+        )
+        self._conexao.commit()
+        self._evento = threading.Event()
+        self._ativo = automatica
+        self._thread = None
+        if automatica:
+            self._thread = threading.Thread(target=self._executar, daemon=True)
+            self._thread.start()
+
+    def registrar(self, horario=None, jogador_id=None, nome=None, jogo=None, pontos_antigos=None,
+                  pontos_novos=None, monitor=None, mensagem_id=None, comando=None, situacao=None):
+        """Grava uma tentativa de pontuação no banco local"""
+        valores = (
+            horario, None if jogador_id is None else str(jogador_id).strip(), nome, jogo,
+            _numero(pontos_antigos), _numero(pontos_novos), monitor, mensagem_id, comando, situacao,
+        )
+        with self._trava:
+            self._conexao.execute(
+                f"INSERT INTO historico ({', '.join(_CAMPOS)}) VALUES ({', '.join('?' * len(_CAMPOS))})",
+                valores,
+            )
+            self._conexao.commit()
+
+    def consultar(self, jogador_id, jogo=None, limite=15):
+        """
+        Últimas tentativas de um jogador, da mais recente para a mais antiga
+
+        Returns:
+            list: dicts com os campos de registrar()
+        """
+        sql = f"SELECT {', '.join(_CAMPOS)} FROM historico WHERE jogador_id = ?"
+        parametros = [str(jogador_id).strip()]
+        if jogo is not None:
+            sql += " AND jogo = ?"
+            parametros.append(jogo)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        parametros.append(limite)
+        with self._trava:
+            linhas = self._conexao.execute(sql, parametros).fetchall()
+        return [dict(zip(_CAMPOS, linha)) for linha in linhas]
+
+    def pendentes(self):
+        """Quantidade de tentativas ainda não enviadas para a planilha"""
+        with self._trava:
+            return self._conexao.execute("SELECT COUNT(*) FROM historico WHERE enviado = 0").fetchone()[0]
+
+    def enviar(self):
+        """
+        Envia para a aba "Historico" as tentativas pendentes, em lotes de até `lote` linhas
+
+        Observação:
+            - Em caso de erro, as tentativas continuam pendentes e a exceção é repassada
+        """
+        if self.aba is None:
+            return
+        with self._trava_envio:
+            while True:
+                with self._trava:
+                    linhas = self._conexao.execute(
+                        f"SELECT seq, {', '.join(_CAMPOS)} FROM historico WHERE enviado = 0 ORDER BY seq LIMIT ?",
+                        (self.lote,),
+                    ).fetchall()
+                if not linhas:
+                    return
+                valores = [["" if valor is None else valor for valor in linha[1:]] for linha in linhas]
+                self.aba().append_rows(valores, value_input_option="RAW")
+                with self._trava:
+                    self._conexao.execute(
+                        "UPDATE historico SET enviado = 1 WHERE enviado = 0 AND seq <= ?", (linhas[-1][0],)
+                    )
+                    self._conexao.commit()
+                if len(linhas) < self.lote:
+                    return
+
+    def _executar(self):
+        while self._ativo:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            if not self._ativo:
+                break
+            try:
+                self.enviar()
+            except Exception as e:
+                print(f"Erro ao enviar o histórico para a planilha: {e}. Tentando novamente...")
+
+    def encerrar(self):
+        """Para o envio em segundo plano e tenta enviar o que ainda estiver pendente"""
+        if self._thread is not None:
+            self._ativo = False
+            self._evento.set()
+            self._thread.join()
+        try:
+            self.enviar()
+        except Exception as e:
+            print(f"Erro ao enviar o histórico: {e}. Ele será enviado ao reiniciar")
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,143 @@
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+from unidecode import unidecode
+
+##########################################################
+# BUSCA APROXIMADA DE JOGADORES (TRIGRAMAS E PREFIXOS)   #
+##########################################################
+
+# Semelhança mínima para que um jogador apareça como candidato no /busca
+LIMIAR_BUSCA = 0.3
+# Semelhança a partir da qual um cadastro novo é tratado como possível duplicado
+LIMIAR_DUPLICADO = 0.7
+
+
+def dobrar(texto):
+    """Remove acentos, pontuação e diferenças de maiúsculas (ex.: "@João  Silva" -> "joao silva")"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", unidecode(str(texto)).lower()).split())
+
+
+def trigramas(texto):
+    """Trigramas de cada palavra de um texto já dobrado, com espaços nas pontas das palavras"""
+    resultado = set()
+    for palavra in texto.split():
+        palavra = f"  {palavra} "
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+
+class IndiceBusca:
+    def __init__(self):
+        """
+        Índice de busca aproximada sobre o Nome e o Contato dos jogadores
+
+        Observação:
+            - Os textos são comparados sem acentos, pontuação e maiúsculas
+            - A semelhança é o coeficiente de Dice entre os trigramas da consulta e do campo,
+            então erros de digitação ("Joao Slva") ainda encontram o jogador
+            - Palavras digitadas pela metade ("jo sil") encontram os jogadores com palavras
+            que começam assim, por busca binária em uma lista ordenada de palavras
+            - Só os jogadores que têm algum trigrama ou prefixo em comum com a consulta são
+            avaliados, então o custo não cresce com o total de jogadores
+        """
+        self.limpar()
+
+    def limpar(self):
+        """Remove todos os jogadores do índice"""
+        self._campos = {}  # linha -> [(texto dobrado, trigramas)] do nome e do contato
+        self._por_trigrama = {}  # trigrama -> {(linha, campo)}
+        self._palavras = []  # (palavra, linha), ordenada
+
+    def adicionar(self, linha, nome, contato):
+        """Indexa (ou reindexa) o nome e o contato do jogador da linha"""
+        self.remover(linha)
+        campos = []
+        for valor in (nome, contato):
+            texto = dobrar(valor) if valor is not None else ""
+            if texto:
+                campos.append((texto, trigramas(texto)))
+        if not campos:
+            return
+        self._campos[linha] = campos
+        for campo, (texto, grupo) in enumerate(campos):
+            for trigrama in grupo:
+                self._por_trigrama.setdefault(trigrama, set()).add((linha, campo))
+            for palavra in set(texto.split()):
+                insort(self._palavras, (palavra, linha))
+
+    def remover(self, linha):
+        """Remove o jogador da linha do índice"""
+        campos = self._campos.pop(linha, None)
+        if campos is None:
+            return
+        for campo, (texto, grupo) in enumerate(campos):
+            for trigrama in grupo:
+                chaves = self._por_trigrama[trigrama]
+                chaves.discard((linha, campo))
+                if not chaves:
+                    del self._por_trigrama[trigrama]
+            for palavra in set(texto.split()):
+                posicao = bisect_left(self._palavras, (palavra, linha))
+                if posicao < len(self._palavras) and self._palavras[posicao] == (palavra, linha):
+                    del self._palavras[posicao]
+
+    def _com_prefixo(self, prefixo):
+        """Linhas com alguma palavra começando pelo prefixo"""
+        linhas = set()
+        posicao = bisect_left(self._palavras, (prefixo,))
+        while posicao < len(self._palavras) and self._palavras[posicao][0].startswith(prefixo):
+            linhas.add(self._palavras[posicao][1])
+            posicao += 1
+        return linhas
+
+    def buscar(self, consulta, n=5, minimo=LIMIAR_BUSCA, prefixos=True):
+        """
+        Retorna os jogadores mais parecidos com a consulta
+
+        Argumentos:
+            consulta (str): nome ou contato, completo ou em parte
+            n (int): quantidade máxima de resultados
+            minimo (float): semelhança mínima (0 a 1)
+            prefixos (bool): considera palavras digitadas pela metade como correspondência forte
+
+        Returns:
+            list: pares (linha, semelhança), do mais para o menos parecido
+        """
+        texto = dobrar(consulta)
+        if not texto:
+            return []
+        grupo = trigramas(texto)
+
+        # Quantos trigramas da consulta cada campo tem em comum, somando as listas de cada trigrama
+        comuns = Counter(chain.from_iterable(self._por_trigrama.get(trigrama, ()) for trigrama in grupo))
+        # Com menos trigramas em comum do que isso, a semelhança nunca chega ao mínimo
+        necessarios = minimo * len(grupo) / 2
+
+        notas = {}
+        for (linha, campo), quantidade in comuns.items():
+            if quantidade < necessarios:
+                continue
+            nota = 2 * quantidade / (len(grupo) + len(self._campos[linha][campo][1]))
+            if nota > notas.get(linha, 0):
+                notas[linha] = nota
+
+        palavras = texto.split()
+        # Prefixos de uma letra só casariam com quase todos os jogadores
+        if prefixos and all(len(palavra) >= 2 for palavra in palavras):
+            com_prefixo = self._com_prefixo(palavras[0])
+            for palavra in palavras[1:]:
+                com_prefixo &= self._com_prefixo(palavra)
+            for linha in com_prefixo:
+                # Quanto mais do campo a consulta cobre, mais perto de 1
+                cobertura = max(len(texto) / len(campo) for campo, _ in self._campos[linha])
+                notas[linha] = max(notas.get(linha, 0), 0.8 + 0.2 * min(1.0, cobertura))
+
+        resultado = [(linha, nota) for linha, nota in notas.items() if nota >= minimo]
+        resultado.sort(key=lambda par: (-par[1], par[0]))
+        return resultado[:n]
+
+    def __len__(self):
+        return len(self._campos)
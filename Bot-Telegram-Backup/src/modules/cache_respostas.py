@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+
+from src.modules.metricas import metricas
+
+##########################################################
+# CACHE DAS RESPOSTAS DOS COMANDOS DE CONSULTA           #
+##########################################################
+
+class CacheRespostas:
+    def __init__(self, capacidade=1024):
+        """
+        Guarda os textos já montados das respostas de consulta (ex.: /busca), os mais recentes primeiro
+
+        Argumentos:
+            capacidade (int): quantidade máxima de respostas guardadas; as menos usadas saem primeiro
+
+        Observação:
+            - A chave deve incluir a versão dos dados usados na resposta (ex.: a versão do registro do
+            jogador), assim uma pontuação nova gera outra chave e a resposta antiga nunca é reaproveitada
+            - Acertos e falhas são contados nas métricas (cache_respostas.acertos / cache_respostas.falhas)
+        """
+        self.capacidade = capacidade
+        self._respostas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, gerar):
+        """
+        Retorna a resposta guardada para a chave ou, se não houver, a gera com gerar() e a guarda
+
+        Observação:
+            - gerar() roda fora da trava, então duas threads podem gerar a mesma resposta ao mesmo tempo
+        """
+        with self._trava:
+            if chave in self._respostas:
+                self._respostas.move_to_end(chave)
+                metricas.contar("cache_respostas.acertos")
+                return self._respostas[chave]
+        metricas.contar("cache_respostas.falhas")
+        resposta = gerar()
+        with self._trava:
+            self._respostas[chave] = resposta
+            self._respostas.move_to_end(chave)
+            while len(self._respostas) > self.capacidade:
+                self._respostas.popitem(last=False)
+        return resposta
+
+    def limpar(self):
+        with self._trava:
+            self._respostas.clear()
+
+    def __len__(self):
+        return len(self._respostas)
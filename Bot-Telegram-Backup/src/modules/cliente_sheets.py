@@ -0,0 +1,258 @@
+import os
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+from src.modules.metricas import metricas
+
+##########################################################
+# CLIENTE DO GOOGLE SHEETS COM COTA, RETRY E COALESCÊNCIA #
+##########################################################
+
+class BaldeTokens:
+    def __init__(self, por_minuto, rajada=5):
+        """
+        Limita a taxa de requisições (token bucket), para não estourar a cota por minuto da API
+
+        Argumentos:
+            por_minuto (int): quantidade de requisições permitidas por minuto
+            rajada (int): quantidade de requisições que podem sair de uma vez, sem esperar
+
+        Observação:
+            - Com uma rajada do tamanho da cota, o primeiro minuto poderia ter quase o dobro
+            da cota (a rajada e a reposição), e a API responderia com 429
+        """
+        self.capacidade = float(max(1, min(por_minuto, rajada)))
+        self.taxa = por_minuto / 60.0
+        self._tokens = self.capacidade
+        self._atualizado = time.monotonic()
+        self._trava = threading.Lock()
+
+    def consumir(self):
+        """
+        Consome um token, esperando se a cota do momento já foi usada
+
+        Returns:
+            float: tempo (em segundos) que foi preciso esperar
+        """
+        esperado = 0.0
+        while True:
+            espera = self.reservar()
+            if espera == 0:
+                return esperado
+            time.sleep(espera)
+            esperado += espera
+
+    def reservar(self):
+        """
+        Tenta consumir um token sem esperar (usado também pelo cliente assíncrono)
+
+        Returns:
+            float: 0 se o token foi consumido, ou o tempo (em segundos) até haver um disponível
+        """
+        with self._trava:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.taxa
+
+    def disponiveis(self):
+        """Quantidade aproximada de requisições disponíveis agora"""
+        with self._trava:
+            agora = time.monotonic()
+            return min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+
+
+class _ChamadaEmAndamento:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+def erro_temporario(erro, idempotente=True):
+    """
+    Indica se vale a pena tentar de novo (cota estourada, erro do servidor ou falha de rede)
+
+    Observação:
+        - Em chamadas não idempotentes (ex.: append), só a cota estourada (429) é repetida,
+        pois nos outros casos a requisição pode ter sido aplicada mesmo com o erro
+    """
+    if isinstance(erro, gspread.exceptions.APIError):
+        return erro.code == 429 or (idempotente and erro.code >= 500)
+    return idempotente and isinstance(erro, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class ClienteSheets:
+    def __init__(self, creds_path, leituras_por_minuto=60, escritas_por_minuto=60, timeout=15,
+                 tentativas_leitura=3, tentativas_escrita=5):
+        """
+        Camada única de acesso ao Google Sheets usada pelo SheetsBot
+
+        Argumentos:
+            creds_path (str): caminho do credentials.json da conta de serviço
+            leituras_por_minuto (int): cota de leituras por minuto
+            escritas_por_minuto (int): cota de escritas por minuto
+            timeout (float): tempo máximo (em segundos) de cada requisição
+            tentativas_leitura (int): tentativas de cada leitura antes de desistir
+            tentativas_escrita (int): tentativas de cada escrita antes de desistir
+
+        Observação:
+            - Mantém uma única sessão autenticada e as abas já abertas, então o open_by_key
+            só acontece uma vez por aba
+            - Erros temporários (429, 5xx, rede) são repetidos com backoff exponencial e jitter
+            - Leituras idênticas feitas ao mesmo tempo (ex.: vários get_all_values) viram uma
+            só requisição, e todas recebem o mesmo resultado
+            - As leituras tentam menos vezes, pois quem lê tem os dados locais como alternativa
+            - A duração de cada chamada e os contadores (novas tentativas, esperas por cota,
+            leituras coalescidas) vão para as métricas (ver metricas.py)
+        """
+        self.client = gspread.service_account(filename=str(creds_path))
+        self.client.set_timeout(timeout)
+        self.leituras = BaldeTokens(leituras_por_minuto)
+        self.escritas = BaldeTokens(escritas_por_minuto)
+        self.tentativas_leitura = tentativas_leitura
+        self.tentativas_escrita = tentativas_escrita
+        self._abas = {}
+        self._trava = threading.Lock()
+        self._em_andamento = {}
+
+    @classmethod
+    def do_ambiente(cls, creds_path):
+        """Cria o cliente com a cota e o timeout configurados no .env"""
+        return cls(
+            creds_path,
+            leituras_por_minuto=int(os.getenv("COTA_LEITURAS_MINUTO", 60)),
+            escritas_por_minuto=int(os.getenv("COTA_ESCRITAS_MINUTO", 60)),
+            timeout=float(os.getenv("TIMEOUT_SHEETS", 10)),
+        )
+
+    def aba(self, spreadsheet_id, sheet_name, cabecalho=None):
+        """
+        Retorna a aba (já protegida pela cota e pelo retry), abrindo a planilha só na primeira vez
+
+        Argumentos:
+            spreadsheet_id (str): ID da planilha Google Sheets
+            sheet_name (str): nome exato da aba/sheet
+            cabecalho (list): se informado e a aba não existir, ela é criada com este cabeçalho
+        """
+        chave = (spreadsheet_id, sheet_name)
+        with self._trava:
+            if chave in self._abas:
+                return self._abas[chave]
+
+        spreadsheet = self.executar(self.client.open_by_key, spreadsheet_id, escrita=False)
+        try:
+            worksheet = self.executar(spreadsheet.worksheet, sheet_name, escrita=False)
+        # Em caso de não encontrar a aba desejada, informa as disponíveis
+        except gspread.WorksheetNotFound:
+            if cabecalho is not None:
+                worksheet = self.executar(
+                    spreadsheet.add_worksheet, sheet_name, 1000, len(cabecalho), escrita=True, idempotente=False
+                )
+                self.executar(worksheet.append_row, cabecalho, escrita=True, idempotente=False)
+                aba = AbaProtegida(self, worksheet)
+                with self._trava:
+                    return self._abas.setdefault(chave, aba)
+            available_sheets = [ws.title for ws in spreadsheet.worksheets()]
+            raise ValueError(
+                f"Aba '{sheet_name}' não encontrada. "
+                f"Abas disponíveis: {', '.join(available_sheets)}"
+            )
+
+        aba = AbaProtegida(self, worksheet)
+        with self._trava:
+            return self._abas.setdefault(chave, aba)
+
+    def executar(self, funcao, *args, escrita=False, idempotente=True, **kwargs):
+        """Executa uma chamada à API respeitando a cota e repetindo em caso de erro temporário"""
+        balde = self.escritas if escrita else self.leituras
+        tentativas = self.tentativas_escrita if escrita else self.tentativas_leitura
+        operacao = f"sheets.{getattr(funcao, '__name__', 'chamada')}"
+        for tentativa in range(tentativas):
+            espera_cota = balde.consumir()
+            if espera_cota > 0:
+                metricas.contar("sheets.esperas_cota")
+                metricas.registrar("sheets.espera_cota", espera_cota)
+            try:
+                with metricas.medir(operacao):
+                    return funcao(*args, **kwargs)
+            except Exception as e:
+                if isinstance(e, gspread.exceptions.APIError) and e.code == 429:
+                    metricas.contar("sheets.cota_estourada")
+                if not erro_temporario(e, idempotente) or tentativa == tentativas - 1:
+                    raise
+                espera = min(32.0, 2 ** tentativa) + random.uniform(0, 1)
+                print(f"Erro temporário na planilha ({e}). Tentando novamente em {espera:.1f}s...")
+                metricas.contar("sheets.retentativas")
+                time.sleep(espera)
+
+    def ler(self, chave, funcao, *args, **kwargs):
+        """
+        Executa uma leitura, juntando-a com uma leitura idêntica que já esteja em andamento
+
+        Argumentos:
+            chave (tuple): identifica leituras idênticas
+            funcao (callable): leitura a ser feita
+        """
+        with self._trava:
+            chamada = self._em_andamento.get(chave)
+            dono = chamada is None
+            if dono:
+                chamada = self._em_andamento[chave] = _ChamadaEmAndamento()
+
+        if not dono:
+            metricas.contar("sheets.leituras_coalescidas")
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = self.executar(funcao, *args, escrita=False, **kwargs)
+            return chamada.resultado
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+            chamada.evento.set()
+
+
+class AbaProtegida:
+    def __init__(self, cliente, worksheet):
+        """
+        Envolve um gspread.Worksheet, passando as chamadas usadas pelo bot pelo ClienteSheets
+
+        Argumentos:
+            cliente (ClienteSheets): cliente que aplica cota, retry e coalescência
+            worksheet (gspread.Worksheet): aba original
+        """
+        self.cliente = cliente
+        self.worksheet = worksheet
+        self.title = worksheet.title
+
+    def _ler(self, nome, *args):
+        return self.cliente.ler((id(self.worksheet), nome, args), getattr(self.worksheet, nome), *args)
+
+    def get_all_values(self):
+        return self._ler("get_all_values")
+
+    def row_values(self, row):
+        return self._ler("row_values", row)
+
+    def batch_get(self, ranges):
+        return self._ler("batch_get", tuple(ranges))
+
+    def batch_update(self, data, **kwargs):
+        return self.cliente.executar(self.worksheet.batch_update, data, escrita=True, **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        return self.cliente.executar(self.worksheet.append_rows, values, escrita=True, idempotente=False, **kwargs)
@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+
+from src.modules.metricas import metricas
+
+##########################################################
+# POOL DE WORKERS QUE PROCESSA OS COMANDOS DO BOT        #
+##########################################################
+
+class Despachante:
+    def __init__(self, num_workers=4, tamanho_fila=100):
+        """
+        Executa os comandos recebidos em um pool de threads, com filas limitadas
+
+        Argumentos:
+            num_workers (int): quantidade de threads processando comandos
+            tamanho_fila (int): quantidade máxima de comandos esperando em cada worker
+
+        Observação:
+            - Comandos com a mesma chave (ex.: o mesmo jogador) vão sempre para o mesmo
+            worker, sendo executados em ordem e nunca ao mesmo tempo
+            - Quando a fila do worker está cheia, quem submete espera (backpressure), o que
+            segura o recebimento de novas mensagens em vez de acumular memória
+            - O tempo que cada comando espera na fila vai para a métrica "despacho.espera_fila"
+        """
+        self.num_workers = max(1, num_workers)
+        self._filas = [queue.Queue(maxsize=tamanho_fila) for _ in range(self.num_workers)]
+        self._trava = threading.Lock()
+        self._metricas = {
+            "submetidos": 0,
+            "processados": 0,
+            "erros": 0,
+            "esperas_fila_cheia": 0,
+            "profundidade_maxima": 0,
+        }
+        self._threads = [
+            threading.Thread(target=self._trabalhar, args=(fila,), daemon=True)
+            for fila in self._filas
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _escolher_fila(self, chave):
+        if chave is None:
+            return min(self._filas, key=lambda fila: fila.qsize())
+        return self._filas[hash(chave) % self.num_workers]
+
+    def submeter(self, chave, funcao, *args):
+        """
+        Agenda a execução de funcao(*args)
+
+        Argumentos:
+            chave (str): chave de serialização (None para comandos sem jogador)
+            funcao (callable): função a ser executada por um worker
+        """
+        fila = self._escolher_fila(chave)
+        tarefa = (funcao, args, time.perf_counter())
+        try:
+            fila.put_nowait(tarefa)
+        except queue.Full:
+            with self._trava:
+                self._metricas["esperas_fila_cheia"] += 1
+            print("Fila de comandos cheia, aguardando um worker liberar espaço...")
+            fila.put(tarefa)
+        with self._trava:
+            self._metricas["submetidos"] += 1
+            self._metricas["profundidade_maxima"] = max(self._metricas["profundidade_maxima"], fila.qsize())
+
+    def _trabalhar(self, fila):
+        while True:
+            tarefa = fila.get()
+            if tarefa is None:
+                fila.task_done()
+                break
+            funcao, args, submetido = tarefa
+            metricas.registrar("despacho.espera_fila", time.perf_counter() - submetido)
+            try:
+                funcao(*args)
+                with self._trava:
+                    self._metricas["processados"] += 1
+            except Exception as e:
+                with self._trava:
+                    self._metricas["erros"] += 1
+                print(f"Erro ao processar comando: {e}")
+            finally:
+                fila.task_done()
+
+    def estatisticas(self):
+        """Retorna as métricas do pool, incluindo a profundidade atual de cada fila"""
+        with self._trava:
+            metricas = dict(self._metricas)
+        metricas["profundidade_atual"] = [fila.qsize() for fila in self._filas]
+        return metricas
+
+    def encerrar(self):
+        """Processa os comandos que já estão nas filas e encerra os workers"""
+        for fila in self._filas:
+            fila.put(None)
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+
+##########################################################
+# DIÁRIO LOCAL (APPEND-ONLY) DAS ESCRITAS NA PLANILHA    #
+##########################################################
+
+class DiarioEscritas:
+    def __init__(self, caminho):
+        """
+        Registra em disco cada escrita aceita pelo bot, antes de ela ir para a planilha
+
+        Argumentos:
+            caminho (str): arquivo JSONL do diário
+
+        Observação:
+            - Cada escrita recebe um número de sequência crescente ("seq")
+            - Depois que um lote é enviado, grava-se {"op": "confirmado", "ate": seq}: todas
+            as escritas até esse número já estão na planilha
+            - Ao reiniciar, as escritas não confirmadas são reaplicadas (ver pendentes())
+        """
+        self.caminho = str(caminho)
+        self._trava = threading.Lock()
+        self.ultimo_seq = 0
+        self._confirmado = 0
+        for entrada in self._ler():
+            if entrada["op"] == "confirmado":
+                self._confirmado = max(self._confirmado, entrada["ate"])
+            else:
+                self.ultimo_seq = max(self.ultimo_seq, entrada["seq"])
+        # A sequência nunca volta atrás, mesmo depois de o diário ser limpo
+        self.ultimo_seq = max(self.ultimo_seq, self._confirmado)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return []
+        entradas = []
+        with open(self.caminho, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                try:
+                    entradas.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    break  # última linha incompleta (o processo caiu no meio da escrita)
+        return entradas
+
+    def _gravar(self, entrada):
+        self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def registrar_celula(self, jogador, coluna, valor):
+        """
+        Registra a atualização de uma célula e retorna seu número de sequência
+
+        Observação:
+            - `jogador` é o Id do jogador (str), gravado em "id", ou a linha (int), gravada em "linha"
+        """
+        with self._trava:
+            self.ultimo_seq += 1
+            campo = "id" if isinstance(jogador, str) else "linha"
+            self._gravar({"op": "celula", "seq": self.ultimo_seq, campo: jogador, "coluna": coluna, "valor": valor})
+            return self.ultimo_seq
+
+    def registrar_linha(self, valores):
+        """Registra a inclusão de uma linha e retorna seu número de sequência"""
+        with self._trava:
+            self.ultimo_seq += 1
+            self._gravar({"op": "linha", "seq": self.ultimo_seq, "valores": list(valores)})
+            return self.ultimo_seq
+
+    def confirmar(self, ate):
+        """Marca como enviadas à planilha todas as escritas com seq <= ate"""
+        with self._trava:
+            if ate <= self._confirmado:
+                return
+            self._confirmado = ate
+            self._gravar({"op": "confirmado", "ate": ate})
+
+    def limpar(self):
+        """Esvazia o diário. Só deve ser chamado quando não há escritas pendentes"""
+        with self._trava:
+            self._arquivo.close()
+            self._arquivo = open(self.caminho, "w", encoding="utf-8")
+            self._gravar({"op": "confirmado", "ate": self.ultimo_seq})
+
+    def pendentes(self):
+        """Retorna, em ordem, as escritas registradas que ainda não foram confirmadas"""
+        with self._trava:
+            confirmado = self._confirmado
+        return sorted(
+            (e for e in self._ler() if e["op"] != "confirmado" and e["seq"] > confirmado),
+            key=lambda e: e["seq"],
+        )
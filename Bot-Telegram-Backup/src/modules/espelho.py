@@ -0,0 +1,71 @@
+##########################################################
+# CÓPIA LOCAL DA ABA, GUARDADA POR COLUNAS               #
+##########################################################
+
+class EspelhoPlanilha:
+    def __init__(self):
+        """
+        Guarda a última leitura da aba como uma lista de valores por coluna
+
+        Observação:
+            - Por colunas, comparar uma leitura nova com a anterior é uma passada por coluna,
+            e só as linhas que mudaram precisam ser reindexadas
+            - Também é o formato do snapshot em disco, mais compacto que uma lista de linhas
+            - A linha 1 da planilha é o cabeçalho; a linha n corresponde à posição n - 2 das colunas
+        """
+        self.cabecalho = []
+        self.colunas = []
+
+    @property
+    def vazio(self):
+        return not self.cabecalho
+
+    @property
+    def total_linhas(self):
+        """Quantidade de linhas de dados (sem o cabeçalho)"""
+        return len(self.colunas[0]) if self.colunas else 0
+
+    @staticmethod
+    def _por_colunas(linhas, largura):
+        colunas = [[] for _ in range(largura)]
+        for linha in linhas:
+            for i in range(largura):
+                colunas[i].append(linha[i] if i < len(linha) else "")
+        return colunas
+
+    def carregar(self, valores):
+        """
+        Substitui o conteúdo por uma leitura completa (incluindo o cabeçalho)
+
+        Returns:
+            set: linhas da planilha cujo conteúdo mudou (ou sumiu), ou None se o cabeçalho mudou
+            e tudo precisa ser refeito
+        """
+        cabecalho = list(valores[0]) if valores else []
+        colunas = self._por_colunas(valores[1:], len(cabecalho))
+        if cabecalho != self.cabecalho:
+            self.cabecalho, self.colunas = cabecalho, colunas
+            return None
+
+        total_antigo = self.total_linhas
+        total_novo = len(valores) - 1
+        mudaram = {linha for linha in range(min(total_antigo, total_novo) + 2, max(total_antigo, total_novo) + 2)}
+        for antiga, nova in zip(self.colunas, colunas):
+            if antiga != nova:
+                mudaram.update(i + 2 for i, (a, b) in enumerate(zip(antiga, nova)) if a != b)
+        self.colunas = colunas
+        return mudaram
+
+    def truncar(self, ultima_linha):
+        """Descarta as linhas depois de `ultima_linha` (número da linha na planilha)"""
+        for coluna in self.colunas:
+            del coluna[max(0, ultima_linha - 1):]
+
+    def anexar(self, linhas):
+        """Acrescenta linhas ao final"""
+        for i, coluna in enumerate(self.colunas):
+            coluna.extend(linha[i] if i < len(linha) else "" for linha in linhas)
+
+    def valores(self):
+        """Conteúdo como lista de linhas (incluindo o cabeçalho), no formato do get_all_values()"""
+        return [list(self.cabecalho)] + [list(linha) for linha in zip(*self.colunas)]
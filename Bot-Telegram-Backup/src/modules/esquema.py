@@ -0,0 +1,59 @@
+##########################################################
+# ESQUEMA (CABEÇALHO E COLUNAS) DA PLANILHA              #
+##########################################################
+
+class EsquemaPlanilha:
+    def __init__(self, jogos):
+        """
+        Guarda a posição de cada coluna da planilha, resolvida uma única vez a partir do cabeçalho
+
+        Argumentos:
+            jogos (dict): jogo -> {"pontos": coluna de pontuação, "timestamp": coluna de horário}
+        """
+        self.jogos = jogos
+        self.cabecalho = None
+        self._posicoes = {}
+
+    @property
+    def valido(self):
+        return self.cabecalho is not None
+
+    def carregar(self, cabecalho):
+        """
+        Resolve as posições das colunas a partir do cabeçalho (linha 1)
+
+        Returns:
+            bool: True se o cabeçalho mudou em relação ao anterior
+        """
+        cabecalho = list(cabecalho)
+        mudou = cabecalho != self.cabecalho
+        if mudou:
+            self.cabecalho = cabecalho
+            self._posicoes = {}
+            for i, nome in enumerate(cabecalho, start=1):
+                self._posicoes.setdefault(nome, i)
+        return mudou
+
+    def coluna(self, nome):
+        """Retorna o índice (começando em 1) da coluna com o nome informado"""
+        try:
+            return self._posicoes[nome]
+        except KeyError:
+            raise ValueError(f"Coluna '{nome}' não encontrada no cabeçalho da planilha")
+
+    def colunas_jogo(self, jogo):
+        """
+        Retorna as colunas de pontuação e de horário de um jogo
+
+        Returns:
+            tuple: (nome da coluna de pontos, nome da coluna de horário, índice de pontos, índice de horário)
+        """
+        if jogo not in self.jogos:
+            raise ValueError(f"Jogo '{jogo}' não reconhecido. Jogos disponíveis: {', '.join(self.jogos)}")
+        coluna_pontos = self.jogos[jogo]["pontos"]
+        coluna_timestamp = self.jogos[jogo]["timestamp"]
+        return coluna_pontos, coluna_timestamp, self.coluna(coluna_pontos), self.coluna(coluna_timestamp)
+
+    def linha_vazia(self):
+        """Retorna uma linha com todas as colunas vazias, no tamanho do cabeçalho"""
+        return [""] * len(self.cabecalho)
@@ -0,0 +1,87 @@
+import json
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.modules.sheets import SheetsBot, jogos
+from src.modules.cliente_sheets import ClienteSheets
+
+##########################################################
+# EVENTOS (PLANILHAS) ATENDIDOS PELO BOT, POR CHAT       #
+##########################################################
+
+class RoteadorEventos:
+    def __init__(self, assincrono=False, caminho=None):
+        """
+        Cria um SheetsBot por evento e indica qual deles atende cada chat
+
+        Argumentos:
+            assincrono (bool): repassado a cada SheetsBot (ver SheetsBot)
+            caminho (str): arquivo de configuração dos eventos (padrão: ARQUIVO_EVENTOS ou lib/eventos.json)
+
+        Observação:
+            - Sem o arquivo, há um único evento (a planilha LINK_GOOGLE_SHEET_PONTUACAO), que atende todos os chats
+            - Formato do arquivo:
+                {"eventos": [{"nome": "gamenight", "planilha": "<id ou variável do .env>", "aba": "Pessoas",
+                              "jogos": ["Touhou", "Tetris"], "chats": [-1001234567890], "padrao": true}]}
+              "aba", "jogos", "chats" e "padrao" são opcionais; o evento "padrao" atende os chats não listados
+            - Todos os eventos compartilham o ClienteSheets (uma sessão autenticada, as abas já abertas
+            e a cota da API), mas cada um tem o próprio índice, esquema de colunas, fila de escrita,
+            diário, snapshot e histórico (lib/diario_<nome>.jsonl, lib/snapshot_<nome>.pkl e
+            lib/historico_<nome>.sqlite3), então um evento movimentado não atrasa os outros
+        """
+        lib_path = Path(__file__).parent.parent.parent / "lib"
+        load_dotenv(lib_path / ".env")
+        caminho = caminho or os.getenv("ARQUIVO_EVENTOS", str(lib_path / "eventos.json"))
+        self.cliente = ClienteSheets.do_ambiente(lib_path / "credentials.json")
+        self.eventos = {}  # nome -> SheetsBot
+        self._por_chat = {}  # chat_id -> SheetsBot
+        self.padrao = None
+
+        if not os.path.exists(caminho):
+            self.padrao = SheetsBot(assincrono, cliente=self.cliente)
+            self.eventos[self.padrao.evento["nome"]] = self.padrao
+            return
+
+        with open(caminho, encoding="utf-8") as arquivo:
+            configuracao = json.load(arquivo)
+        for item in configuracao.get("eventos", []):
+            nome = item.get("nome")
+            if not nome or not item.get("planilha"):
+                raise ValueError(f"Evento sem 'nome' ou 'planilha' em {caminho}: {item}")
+            if nome in self.eventos:
+                raise ValueError(f"Evento '{nome}' repetido em {caminho}")
+            evento = {
+                "nome": nome,
+                # A planilha pode ser o próprio id ou o nome de um campo do .env que o contém
+                "planilha": os.getenv(item["planilha"], item["planilha"]),
+                "aba": item.get("aba", "Pessoas"),
+                "jogos": item.get("jogos", list(jogos)),
+                "diario": item.get("diario", str(lib_path / f"diario_{nome}.jsonl")),
+                "snapshot": item.get("snapshot", str(lib_path / f"snapshot_{nome}.pkl")),
+                "historico": item.get("historico", str(lib_path / f"historico_{nome}.sqlite3")),
+            }
+            sheets_bot = SheetsBot(assincrono, evento, self.cliente)
+            self.eventos[nome] = sheets_bot
+            for chat in item.get("chats", []):
+                self._por_chat[int(chat)] = sheets_bot
+            if item.get("padrao"):
+                self.padrao = sheets_bot
+
+        if not self.eventos:
+            raise ValueError(f"Nenhum evento configurado em {caminho}")
+        if self.padrao is None and len(self.eventos) == 1:
+            self.padrao = next(iter(self.eventos.values()))
+
+    def para_chat(self, chat_id):
+        """Retorna o SheetsBot do evento que atende o chat, ou None se nenhum atender"""
+        return self._por_chat.get(chat_id, self.padrao)
+
+    def __iter__(self):
+        return iter(self.eventos.values())
+
+    def encerrar(self):
+        """Envia as escritas pendentes de todos os eventos"""
+        for sheets_bot in self:
+            sheets_bot.encerrar()
@@ -0,0 +1,335 @@
+import threading
+from contextlib import contextmanager
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+##########################################################
+# FILA DE ESCRITA (WRITE-BEHIND) PARA O GOOGLE SHEETS    #
+##########################################################
+
+class FilaEscrita:
+    def __init__(self, planilha, intervalo=2.0, limite=50, ao_falhar=None, automatica=True, diario=None,
+                 localizar=None, ao_anexar=None):
+        """
+        Acumula as escritas do bot e as envia à planilha em lote, em segundo plano
+
+        Argumentos:
+            planilha (gspread.Worksheet): aba onde as escritas são feitas
+            intervalo (float): tempo máximo (em segundos) que uma escrita fica pendente
+            limite (int): quantidade de escritas pendentes que dispara um envio imediato
+            ao_falhar (callable): função chamada com a exceção quando um envio falha
+            automatica (bool): quando False, não há envio em segundo plano e quem usa a fila
+            deve retirar() as escritas pendentes e enviá-las por conta própria
+            diario (DiarioEscritas): diário em disco onde cada escrita é gravada antes de entrar na fila
+            localizar (callable): recebe o Id de um jogador e retorna a sua linha atual na planilha
+            (ou None), usada para as células agendadas pelo Id (ver atualizar_celula)
+            ao_anexar (callable): chamada com (primeira linha, linhas) depois de um append_rows,
+            com a linha onde a planilha de fato colocou as linhas novas
+
+        Observação:
+            - As células atualizadas são enviadas com um único batch_update e as linhas
+            novas com um único append_rows. As linhas novas são enviadas antes das
+            células, pois as células podem se referir a elas
+            - As células de um jogador são agendadas pelo seu Id, e a linha só é resolvida no
+            envio: linhas digitadas, apagadas ou movidas direto na planilha depois da última
+            leitura não fazem a escrita cair na linha de outro jogador
+            - Atualizações repetidas da mesma célula são combinadas, vale a mais recente
+            - Com um diário, as escritas sobrevivem a quedas do bot e da planilha: só são
+            confirmadas no diário depois que o lote é enviado com sucesso
+        """
+        self.planilha = planilha
+        self.intervalo = intervalo
+        self.limite = limite
+        self.ao_falhar = ao_falhar
+        self.diario = diario
+        self._seq_retirada = 0
+        self.localizar = localizar
+        self.ao_anexar = ao_anexar
+        self._celulas = {}  # (Id do jogador ou linha, coluna) -> valor
+        self._linhas = []
+        self._trava = threading.Lock()
+        self._trava_envio = threading.RLock()
+        self._evento = threading.Event()
+        self._pausas = 0
+        self._lotes = 0
+        self._ativo = automatica
+        self._thread = None
+        if automatica:
+            self._thread = threading.Thread(target=self._executar, daemon=True)
+            self._thread.start()
+
+    def atualizar_celula(self, jogador, coluna, valor):
+        """
+        Agenda a atualização de uma célula
+
+        Argumentos:
+            jogador (str | int): Id do jogador (str), resolvido para a linha só no envio, ou o
+            número da linha (int), para jogadores sem Id
+            coluna (int): índice da coluna (começando em 1)
+            valor: novo valor da célula
+        """
+        with self._trava:
+            if self.diario is not None:
+                self.diario.registrar_celula(jogador, coluna, valor)
+            self._celulas[(jogador, coluna)] = valor
+            cheia = self._tamanho() >= self.limite
+        if cheia:
+            self._evento.set()
+
+    def adicionar_linha(self, valores):
+        """Agenda a inclusão de uma linha ao final da planilha"""
+        with self._trava:
+            if self.diario is not None:
+                self.diario.registrar_linha(valores)
+            self._linhas.append(list(valores))
+            cheia = self._tamanho() >= self.limite
+        if cheia:
+            self._evento.set()
+
+    def restaurar(self, entradas):
+        """Coloca de volta na fila as escritas não confirmadas do diário (sem registrá-las de novo)"""
+        with self._trava:
+            for entrada in entradas:
+                if entrada["op"] == "celula":
+                    jogador = entrada["id"] if "id" in entrada else entrada["linha"]
+                    self._celulas[(jogador, entrada["coluna"])] = entrada["valor"]
+                elif entrada["op"] == "linha":
+                    self._linhas.append(list(entrada["valores"]))
+
+    def pendencias(self):
+        """
+        Cópia das escritas pendentes, sem retirá-las da fila
+
+        Returns:
+            tuple: (linhas novas, células pendentes {(Id do jogador ou linha, coluna): valor})
+        """
+        with self._trava:
+            return [list(linha) for linha in self._linhas], dict(self._celulas)
+
+    def sobrepor(self, valores, colunas_chave=None, inicio=1, largura=None):
+        """
+        Aplica as escritas pendentes sobre uma leitura da planilha, para que o estado em
+        memória não perca o que ainda não foi enviado
+
+        Argumentos:
+            valores (list): linhas lidas da aba, alteradas no próprio objeto
+            colunas_chave (list): índices (começando em 1) das colunas que identificam um jogador
+            (Id, Nome e Contato). Linhas pendentes iguais a uma linha lida nessas colunas são
+            descartadas da fila, pois já foram enviadas antes de uma queda
+            inicio (int): linha da planilha correspondente a valores[0]. Com 1 (leitura completa),
+            valores[0] é o cabeçalho
+            largura (int): quantidade de colunas da aba (por padrão, o tamanho de valores[0])
+
+        Observação:
+            - As células agendadas pelo Id vão para a linha onde o Id aparece na leitura (ou nas
+            linhas pendentes), e são ignoradas se ele não aparecer
+            - Em uma leitura parcial (inicio > 1), as células pendentes de linhas anteriores
+            a `inicio` são ignoradas, e as linhas pendentes vão para depois das lidas
+        """
+        with self._trava:
+            dados = valores[1:] if inicio == 1 else valores
+            if colunas_chave:
+                lidas = {self._chave_linha(linha, colunas_chave) for linha in dados}
+                self._linhas = [
+                    linha for linha in self._linhas
+                    if self._chave_linha(linha, colunas_chave) not in lidas
+                ]
+            if largura is None:
+                largura = len(valores[0]) if valores else 0
+            for linha in self._linhas:
+                valores.append(list(linha) + [""] * (largura - len(linha)))
+            posicoes = {}
+            if colunas_chave:
+                primeira = 1 if inicio == 1 else 0
+                for posicao in range(len(valores) - 1, primeira - 1, -1):
+                    posicoes[self._chave_linha(valores[posicao], colunas_chave[:1])[0]] = posicao
+            for (jogador, coluna), valor in self._celulas.items():
+                if isinstance(jogador, str):
+                    posicao = posicoes.get(jogador)
+                    if posicao is None:
+                        continue
+                elif jogador < inicio:
+                    continue
+                else:
+                    posicao = jogador - inicio
+                while len(valores) <= posicao:
+                    valores.append([""] * largura)
+                if len(valores[posicao]) < coluna:
+                    valores[posicao].extend([""] * (coluna - len(valores[posicao])))
+                valores[posicao][coluna - 1] = valor
+
+    @staticmethod
+    def _chave_linha(linha, colunas):
+        return tuple(str(linha[coluna - 1]).strip() if len(linha) >= coluna else "" for coluna in colunas)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa várias escritas para que elas sejam enviadas juntas
+
+        Observação:
+            - Enquanto o lote é montado, nada é retirado da fila, então nenhuma parte do lote
+            sai sozinha. Ao final, o envio do lote é disparado
+            - Não espera um envio em andamento (que pode levar vários segundos com a planilha
+            lenta): as escritas do lote só entram na fila depois que ele já retirou as dele
+        """
+        with self._trava:
+            self._lotes += 1
+        try:
+            yield
+        finally:
+            with self._trava:
+                self._lotes -= 1
+            self._evento.set()
+
+    @contextmanager
+    def pausada(self):
+        """
+        Suspende os envios enquanto o bloco executa, sem bloquear quem coloca escritas na fila
+
+        Observação:
+            - Espera o envio em andamento terminar antes de entrar no bloco
+            - Serve para ler a planilha sem segurar outras travas: nenhum lote sai durante a
+            leitura, então toda escrita ou já está nela ou ainda está na fila
+        """
+        with self._trava_envio:
+            self._pausas += 1
+        try:
+            yield
+        finally:
+            with self._trava_envio:
+                self._pausas -= 1
+            self._evento.set()
+
+    def _tamanho(self):
+        return len(self._celulas) + len(self._linhas)
+
+    def pendentes(self):
+        """Quantidade de escritas ainda não enviadas"""
+        with self._trava:
+            return self._tamanho()
+
+    def retirar(self):
+        """
+        Retira da fila todas as escritas pendentes
+
+        Returns:
+            tuple: (linhas novas, células pendentes {(Id do jogador ou linha, coluna): valor});
+            vazias enquanto um lote estiver sendo montado
+        """
+        with self._trava:
+            if self._lotes:
+                return [], {}
+            celulas, self._celulas = self._celulas, {}
+            linhas, self._linhas = self._linhas, []
+            if self.diario is not None:
+                self._seq_retirada = self.diario.ultimo_seq
+        return linhas, celulas
+
+    def confirmar_envio(self):
+        """Marca no diário que o último lote retirado foi enviado com sucesso"""
+        if self.diario is None:
+            return
+        with self._trava:
+            self.diario.confirmar(self._seq_retirada)
+            # Sem nada pendente, o diário pode ser esvaziado para não crescer sem limite
+            if not self._tamanho() and self._seq_retirada == self.diario.ultimo_seq:
+                self.diario.limpar()
+
+    def devolver(self, linhas, celulas):
+        """Devolve à fila escritas que não puderam ser enviadas, sem sobrescrever escritas mais recentes"""
+        with self._trava:
+            self._linhas = linhas + self._linhas
+            for chave, valor in celulas.items():
+                self._celulas.setdefault(chave, valor)
+
+    def registrar_anexo(self, resposta, linhas):
+        """
+        Informa a ao_anexar onde o append_rows colocou as linhas novas
+
+        Argumentos:
+            resposta (dict): resposta da API ao append_rows, com "updates.updatedRange"
+            linhas (list): linhas enviadas
+        """
+        intervalo = ((resposta or {}).get("updates") or {}).get("updatedRange")
+        if self.ao_anexar is None or not intervalo:
+            return
+        primeira, _ = a1_to_rowcol(intervalo.rsplit("!", 1)[-1].split(":")[0])
+        self.ao_anexar(primeira, linhas)
+
+    def resolver_linhas(self, celulas):
+        """
+        Troca o Id do jogador de cada célula pela sua linha atual (ver localizar)
+
+        Returns:
+            dict: {(linha, coluna): valor}, sem as células de jogadores que não estão mais na planilha
+        """
+        resolvidas = {}
+        for (jogador, coluna), valor in celulas.items():
+            linha = jogador
+            if isinstance(jogador, str):
+                linha = self.localizar(jogador) if self.localizar is not None else None
+                if linha is None:
+                    print(f"Jogador de Id {jogador} não está mais na planilha. Escrita na coluna {coluna} descartada")
+                    continue
+            resolvidas[(linha, coluna)] = valor
+        return resolvidas
+
+    @staticmethod
+    def dados_batch_update(celulas):
+        """Converte as células (já com as linhas resolvidas) no formato esperado pelo batch_update"""
+        return [
+            {"range": rowcol_to_a1(linha, coluna), "values": [[valor]]}
+            for (linha, coluna), valor in celulas.items()
+        ]
+
+    def descarregar(self):
+        """
+        Envia imediatamente todas as escritas pendentes
+
+        Observação:
+            - Em caso de erro, as escritas voltam para a fila (sem sobrescrever escritas
+            mais recentes das mesmas células) e a exceção é repassada
+        """
+        with self._trava_envio:
+            if self.planilha is None or self._pausas:
+                return  # a planilha ainda não foi aberta ou há uma leitura em andamento
+            linhas, celulas = self.retirar()
+            if not celulas and not linhas:
+                return
+
+            try:
+                if linhas:
+                    resposta = self.planilha.append_rows(linhas, value_input_option="RAW")
+                    self.registrar_anexo(resposta, linhas)
+                    linhas = []
+                resolvidas = self.resolver_linhas(celulas)
+                if resolvidas:
+                    self.planilha.batch_update(
+                        self.dados_batch_update(resolvidas),
+                        value_input_option="USER_ENTERED",
+                    )
+            except Exception as e:
+                self.devolver(linhas, celulas)
+                if self.ao_falhar is not None:
+                    self.ao_falhar(e)
+                raise
+            self.confirmar_envio()
+
+    def _executar(self):
+        while self._ativo:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            if not self._ativo:
+                break
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f"Erro ao enviar escritas para a planilha: {e}. Tentando novamente...")
+
+    def encerrar(self):
+        """Para o envio em segundo plano e envia o que ainda estiver pendente"""
+        if self._thread is not None:
+            self._ativo = False
+            self._evento.set()
+            self._thread.join()
+            self.descarregar()
@@ -0,0 +1,209 @@
+import re
+import threading
+
+##########################################################
+# ÍNDICE RESIDENTE DOS JOGADORES DA PLANILHA             #
+##########################################################
+
+COLUNA_ID = "Id"
+COLUNA_NOME = "Nome"
+COLUNA_CONTATO = "Contato (telegram/numero)"
+
+
+def normalizar_nome(nome):
+    """Normaliza um nome para comparação (em minúsculas e com os espaços repetidos removidos)"""
+    return " ".join(str(nome).lower().split())
+
+
+def normalizar_contato(contato):
+    """
+    Normaliza um contato para comparação
+
+    Observação:
+        - Usernames do Telegram não diferenciam maiúsculas e o "@" é opcional
+        - Em telefones, espaços, traços, pontos e parênteses são ignorados
+    """
+    return re.sub(r"[\s\-().@]", "", str(contato).lower())
+
+
+class AlocadorIds:
+    def __init__(self):
+        """
+        Gera os Ids dos jogadores novos, sempre acima do maior Id já visto na planilha
+
+        Observação:
+            - O contador nunca volta atrás, mesmo que a planilha seja relida sem algumas linhas,
+            então um Id nunca é entregue duas vezes pelo mesmo processo
+            - Ids que não são números inteiros são ignorados
+        """
+        self._trava = threading.Lock()
+        self.ultimo = 0
+
+    def observar(self, id):
+        """Registra um Id existente, para que os próximos sejam maiores que ele"""
+        try:
+            numero = float(str(id).strip())
+        except ValueError:
+            return
+        if not numero.is_integer():
+            return
+        with self._trava:
+            self.ultimo = max(self.ultimo, int(numero))
+
+    def alocar(self):
+        """Reserva e retorna o próximo Id"""
+        with self._trava:
+            self.ultimo += 1
+            return self.ultimo
+
+    def __getstate__(self):
+        # A trava não pode ser guardada no snapshot; uma nova é criada ao carregá-lo
+        return {"ultimo": self.ultimo}
+
+    def __setstate__(self, estado):
+        self._trava = threading.Lock()
+        self.ultimo = estado["ultimo"]
+
+
+class IndiceJogadores:
+    def __init__(self, ranking=None, busca=None):
+        """
+        Mantém em memória os registros da planilha, indexados por linha, Id, Nome e Contato
+
+        Argumentos:
+            ranking (Ranking): ranking mantido junto com o índice, a cada registro alterado
+            busca (IndiceBusca): índice de busca aproximada mantido junto com o índice
+
+        Observação:
+            - Cada chave aponta para a primeira linha em que aparece, reproduzindo o
+            comportamento da antiga busca linear
+            - Os Ids de jogadores novos saem de `ids`, que acompanha o maior Id indexado
+            - `versao` aumenta a cada alteração, para quem precisa saber se algo mudou, e
+            versao_registro() diz em qual versão cada registro mudou pela última vez
+        """
+        self.ranking = ranking
+        self.busca = busca
+        self.ids = AlocadorIds()
+        self.versao = 0
+        self._versoes = {}  # linha -> versão da última alteração do registro
+        self.registros = {}  # linha -> registro
+        self.ultima_linha = 1  # linha 1 é o cabeçalho
+        self._por_id = {}
+        self._por_nome = {}
+        self._por_contato = {}
+
+    def reconstruir(self, registros, ultima_linha):
+        """
+        Reconstrói o índice a partir de uma leitura completa da planilha
+
+        Argumentos:
+            registros (iterable): pares (linha, registro) das linhas não vazias
+            ultima_linha (int): última linha ocupada da planilha (incluindo linhas vazias no meio)
+        """
+        self.registros = {}
+        self._por_id = {}
+        self._por_nome = {}
+        self._por_contato = {}
+        self._versoes = {}
+        self.ultima_linha = 1
+        self.versao += 1
+        if self.ranking is not None:
+            self.ranking.limpar()
+        if self.busca is not None:
+            self.busca.limpar()
+        for linha, registro in registros:
+            self.adicionar(linha, registro)
+        self.ultima_linha = max(self.ultima_linha, ultima_linha)
+
+    def _chaves(self, registro):
+        chaves = []
+        if str(registro.get(COLUNA_ID, "")).strip():
+            chaves.append((self._por_id, str(registro.get(COLUNA_ID)).strip()))
+        if str(registro.get(COLUNA_NOME, "")).strip():
+            chaves.append((self._por_nome, normalizar_nome(registro.get(COLUNA_NOME))))
+        contato = normalizar_contato(registro.get(COLUNA_CONTATO, ""))
+        if contato:
+            chaves.append((self._por_contato, contato))
+        return chaves
+
+    def _indexar(self, linha, registro):
+        self.ids.observar(registro.get(COLUNA_ID, ""))
+        for indice, chave in self._chaves(registro):
+            if chave not in indice or linha < indice[chave]:
+                indice[chave] = linha
+
+    def _desindexar(self, linha, registro):
+        for indice, chave in self._chaves(registro):
+            if indice.get(chave) == linha:
+                del indice[chave]
+
+    def adicionar(self, linha, registro):
+        """Adiciona (ou substitui) o registro de uma linha"""
+        if linha in self.registros:
+            self._desindexar(linha, self.registros[linha])
+        self.registros[linha] = registro
+        self.versao += 1
+        self._versoes[linha] = self.versao
+        self._indexar(linha, registro)
+        self.ultima_linha = max(self.ultima_linha, linha)
+        if self.ranking is not None:
+            self.ranking.atualizar(linha, registro)
+        if self.busca is not None:
+            self.busca.adicionar(linha, registro.get(COLUNA_NOME), registro.get(COLUNA_CONTATO))
+
+    def remover(self, linha):
+        """Remove o registro de uma linha (ex.: a linha foi esvaziada na planilha)"""
+        registro = self.registros.pop(linha, None)
+        if registro is None:
+            return
+        self.versao += 1
+        self._versoes.pop(linha, None)
+        self._desindexar(linha, registro)
+        # Uma chave que apontava para esta linha pode existir em outra linha mais abaixo
+        if any(chave not in indice for indice, chave in self._chaves(registro)):
+            for outra, outro_registro in self.registros.items():
+                self._indexar(outra, outro_registro)
+        if self.ranking is not None:
+            self.ranking.remover(linha)
+        if self.busca is not None:
+            self.busca.remover(linha)
+
+    def atualizar(self, linha, campo, valor):
+        """Atualiza um campo de um registro já indexado, mantendo os índices consistentes"""
+        registro = self.registros[linha]
+        self._desindexar(linha, registro)
+        registro[campo] = valor
+        self.versao += 1
+        self._versoes[linha] = self.versao
+        self._indexar(linha, registro)
+        if self.ranking is not None:
+            self.ranking.atualizar(linha, registro)
+        if self.busca is not None and campo in (COLUNA_NOME, COLUNA_CONTATO):
+            self.busca.adicionar(linha, registro.get(COLUNA_NOME), registro.get(COLUNA_CONTATO))
+
+    def buscar(self, id=None, nome=None, contato=None):
+        """
+        Busca um jogador pelo Id ou, caso nome e contato sejam informados, pelo Nome ou Contato
+
+        Returns:
+            tuple: (linha, registro) ou (None, None) se não encontrado
+        """
+        candidatas = []
+        if id is not None:
+            candidatas.append(self._por_id.get(str(id).strip()))
+        if nome and contato:
+            candidatas.append(self._por_nome.get(normalizar_nome(nome)))
+            if normalizar_contato(contato):
+                candidatas.append(self._por_contato.get(normalizar_contato(contato)))
+        candidatas = [linha for linha in candidatas if linha is not None]
+        if not candidatas:
+            return None, None
+        linha = min(candidatas)
+        return linha, self.registros[linha]
+
+    def versao_registro(self, linha):
+        """Versão do índice em que o registro da linha mudou pela última vez (None se não existir)"""
+        return self._versoes.get(linha)
+
+    def __len__(self):
+        return len(self.registros)
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+##########################################################
+# MÉTRICAS DE LATÊNCIA E CONTADORES DO BOT               #
+##########################################################
+
+class Histograma:
+    def __init__(self, amostras=2048):
+        """
+        Guarda as durações mais recentes de uma operação para calcular percentis
+
+        Argumentos:
+            amostras (int): quantidade de durações recentes guardadas
+        """
+        self.duracoes = deque(maxlen=amostras)
+        self.quantidade = 0
+        self.erros = 0
+        self.soma = 0.0
+
+    def registrar(self, duracao, erro=False):
+        self.duracoes.append(duracao)
+        self.quantidade += 1
+        self.soma += duracao
+        if erro:
+            self.erros += 1
+
+    def percentil(self, p):
+        """Percentil p (entre 0 e 1) das durações recentes, em segundos"""
+        if not self.duracoes:
+            return 0.0
+        ordenadas = sorted(self.duracoes)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+class Metricas:
+    def __init__(self):
+        """
+        Agrega a duração das operações do bot (comandos, chamadas ao Telegram e ao Sheets)
+
+        Observação:
+            - Use a instância compartilhada `metricas` deste módulo
+        """
+        self._trava = threading.Lock()
+        self._operacoes = {}
+        self._contadores = {}
+        self.inicio = time.time()
+
+    @contextmanager
+    def medir(self, operacao):
+        """Mede a duração do bloco e a registra na operação, marcando erro se houver exceção"""
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            yield
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            self.registrar(operacao, time.perf_counter() - inicio, erro)
+
+    def registrar(self, operacao, duracao, erro=False):
+        """Registra a duração (em segundos) de uma execução da operação"""
+        with self._trava:
+            if operacao not in self._operacoes:
+                self._operacoes[operacao] = Histograma()
+            self._operacoes[operacao].registrar(duracao, erro)
+
+    def contar(self, nome, quantidade=1):
+        """Soma a um contador (ex.: novas tentativas, esperas por cota)"""
+        with self._trava:
+            self._contadores[nome] = self._contadores.get(nome, 0) + quantidade
+
+    def resumo(self):
+        """
+        Returns:
+            tuple: ({operação: {quantidade, erros, soma, p50, p95, p99}}, {contador: valor})
+        """
+        with self._trava:
+            operacoes = {
+                nome: {
+                    "quantidade": h.quantidade,
+                    "erros": h.erros,
+                    "soma": h.soma,
+                    "p50": h.percentil(0.50),
+                    "p95": h.percentil(0.95),
+                    "p99": h.percentil(0.99),
+                }
+                for nome, h in self._operacoes.items()
+            }
+            return operacoes, dict(self._contadores)
+
+    def texto_stats(self):
+        """Resumo legível das métricas, usado pelo comando /stats"""
+        operacoes, contadores = self.resumo()
+        minutos = (time.time() - self.inicio) / 60
+        msg = f"📊 **Métricas do bot** (últimos {minutos:.0f} min)\n\n"
+        for nome in sorted(operacoes):
+            o = operacoes[nome]
+            msg += (
+                f"• `{nome}`: {o['quantidade']}x, {o['erros']} erros | "
+                f"p50 {o['p50'] * 1000:.0f}ms · p95 {o['p95'] * 1000:.0f}ms · p99 {o['p99'] * 1000:.0f}ms\n"
+            )
+        if contadores:
+            msg += "\n🔢 **Contadores**\n"
+            for nome in sorted(contadores):
+                msg += f"• `{nome}`: {contadores[nome]}\n"
+        return msg
+
+    def exportar_prometheus(self):
+        """Métricas no formato de texto do Prometheus"""
+        operacoes, contadores = self.resumo()
+        linhas = [
+            "# TYPE gamenight_operacao_segundos summary",
+        ]
+        for nome in sorted(operacoes):
+            o = operacoes[nome]
+            rotulo = f'operacao="{nome}"'
+            for quantil, chave in [("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")]:
+                linhas.append(f'gamenight_operacao_segundos{{{rotulo},quantile="{quantil}"}} {o[chave]:.6f}')
+            linhas.append(f"gamenight_operacao_segundos_count{{{rotulo}}} {o['quantidade']}")
+            linhas.append(f"gamenight_operacao_segundos_sum{{{rotulo}}} {o['soma']:.6f}")
+        linhas.append("# TYPE gamenight_operacao_erros_total counter")
+        for nome in sorted(operacoes):
+            linhas.append(f'gamenight_operacao_erros_total{{operacao="{nome}"}} {operacoes[nome]["erros"]}')
+        linhas.append("# TYPE gamenight_contador_total counter")
+        for nome in sorted(contadores):
+            linhas.append(f'gamenight_contador_total{{nome="{nome}"}} {contadores[nome]}')
+        return "\n".join(linhas) + "\n"
+
+    def iniciar_exportacao(self, arquivo=None, porta=None, intervalo=15, host="127.0.0.1"):
+        """
+        Exporta as métricas no formato do Prometheus, em segundo plano
+
+        Argumentos:
+            arquivo (str): arquivo reescrito a cada `intervalo` segundos
+            porta (int): porta de um servidor HTTP local que responde as métricas em /metrics
+            host (str): endereço em que o servidor escuta (por padrão, só a própria máquina)
+        """
+        if arquivo:
+            def gravar():
+                while True:
+                    time.sleep(intervalo)
+                    temporario = f"{arquivo}.tmp"
+                    try:
+                        with open(temporario, "w", encoding="utf-8") as saida:
+                            saida.write(self.exportar_prometheus())
+                        os.replace(temporario, arquivo)
+                    except OSError as e:
+                        print(f"Erro ao gravar as métricas: {e}")
+            threading.Thread(target=gravar, daemon=True).start()
+
+        if porta:
+            metricas = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.rstrip("/") not in ("", "/metrics"):
+                        self.send_error(404)
+                        return
+                    corpo = metricas.exportar_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+
+                def log_message(self, *args):
+                    pass
+
+            servidor = ThreadingHTTPServer((host, int(porta)), Handler)
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+
+metricas = Metricas()
@@ -0,0 +1,73 @@
+from bisect import bisect_left, insort
+
+##########################################################
+# RANKING POR JOGO, MANTIDO INCREMENTALMENTE             #
+##########################################################
+
+class Ranking:
+    def __init__(self, jogos):
+        """
+        Mantém, para cada jogo, a lista de jogadores ordenada pela pontuação
+
+        Argumentos:
+            jogos (dict): jogo -> {"pontos": coluna de pontuação, "timestamp": coluna de horário}
+
+        Observação:
+            - Cada lista guarda tuplas (-pontos, linha), então a ordem natural já é do maior
+            para o menor, com empates decididos por quem está antes na planilha
+            - Atualizar a pontuação de um jogador custa uma busca binária e uma inserção,
+            e o top N é só uma fatia do início da lista
+        """
+        self.jogos = jogos
+        self._ordenado = {jogo: [] for jogo in jogos}
+        self._pontos = {jogo: {} for jogo in jogos}  # jogo -> {linha: pontos}
+
+    @staticmethod
+    def _pontuacao(valor):
+        if valor is None or str(valor).strip() == "":
+            return None
+        try:
+            return float(valor)
+        except ValueError:
+            return None
+
+    def limpar(self):
+        """Remove todos os jogadores do ranking"""
+        self._ordenado = {jogo: [] for jogo in self.jogos}
+        self._pontos = {jogo: {} for jogo in self.jogos}
+
+    def remover(self, linha):
+        """Remove o jogador da linha de todos os rankings"""
+        for jogo in self.jogos:
+            pontos = self._pontos[jogo].pop(linha, None)
+            if pontos is not None:
+                ordenado = self._ordenado[jogo]
+                del ordenado[bisect_left(ordenado, (-pontos, linha))]
+
+    def atualizar(self, linha, registro):
+        """Coloca o jogador da linha na posição correspondente às pontuações do registro"""
+        for jogo, colunas in self.jogos.items():
+            pontos = self._pontuacao(registro.get(colunas["pontos"]))
+            antigo = self._pontos[jogo].get(linha)
+            if pontos == antigo:
+                continue
+            ordenado = self._ordenado[jogo]
+            if antigo is not None:
+                del ordenado[bisect_left(ordenado, (-antigo, linha))]
+                del self._pontos[jogo][linha]
+            if pontos is not None:
+                insort(ordenado, (-pontos, linha))
+                self._pontos[jogo][linha] = pontos
+
+    def top(self, jogo, n=10):
+        """
+        Retorna os n melhores jogadores de um jogo
+
+        Returns:
+            list: pares (linha, pontos), do maior para o menor
+        """
+        return [(linha, -pontos) for pontos, linha in self._ordenado[jogo][:n]]
+
+    def total(self, jogo):
+        """Quantidade de jogadores com pontuação no jogo"""
+        return len(self._ordenado[jogo])
@@ -1,8 +1,22 @@
 from dotenv import load_dotenv
 import os
-import gspread
+import time
+import threading
+import functools
+from gspread.utils import numericise_all, to_records, rowcol_to_a1
 import pandas as pd
 from pathlib import Path
+from src.modules.indice import IndiceJogadores
+from src.modules.fila_escrita import FilaEscrita
+from src.modules.esquema import EsquemaPlanilha
+from src.modules.diario import DiarioEscritas
+from src.modules.ranking import Ranking
+from src.modules.busca_aproximada import IndiceBusca, LIMIAR_DUPLICADO
+from src.modules.cliente_sheets import ClienteSheets
+from src.modules.espelho import EspelhoPlanilha
+from src.modules import snapshot
+from src.modules.auditoria import Auditoria, CABECALHO_HISTORICO
+from src.modules.metricas import metricas
 
 load_dotenv()
 
@@ -10,18 +24,48 @@ load_dotenv()
 # CLASSE DO BOT REFERENTE ÀS OPERAÇÕES COM GOOGLE SHEETS #
 ##########################################################
 
-jogos = {
-    "Touhou": 1,
-    "Guitar Hero": 2,
-    "Chicken": 3,
-    "Tetris": 4
-}
+def colunas_jogos(nomes):
+    """Colunas da planilha onde cada jogo é registrado"""
+    return {
+        jogo: {"pontos": f"Pontuação ({jogo})", "timestamp": f"Timestamp ({jogo})"}
+        for jogo in nomes
+    }
+
+# Jogos da Game Night (usados quando não há um lib/eventos.json)
+jogos = colunas_jogos(["Touhou", "Guitar Hero", "Chicken", "Tetris"])
+
+def sincronizado(metodo):
+    """Executa o método segurando a trava do SheetsBot, pois ele é compartilhado pelos workers"""
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        with self._trava:
+            return metodo(self, *args, **kwargs)
+    return envoltorio
+
+def com_dados_recentes(metodo):
+    """
+    Recarrega a planilha se o cache expirou (sem segurar a trava) e então executa o método
+    segurando a trava do SheetsBot
+    """
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        self.recarregar_dados()
+        with self._trava:
+            return metodo(self, *args, **kwargs)
+    return envoltorio
 
 class SheetsBot:
-    def __init__(self):
+    def __init__(self, assincrono=False, evento=None, cliente=None):
         """
         Inicializa a classe, de tal modo que o bot recebe as suas credenciais para operar sobre documentos google sheets
 
+        Argumentos:
+            assincrono (bool): quando True, as leituras e escritas na planilha ficam a cargo de quem
+            usa a classe (ex.: TelegramBotAsync), via aplicar_valores() e fila.retirar()
+            evento (dict): planilha, aba, jogos e arquivos locais do evento (ver eventos.py). Sem ele,
+            usa a planilha LINK_GOOGLE_SHEET_PONTUACAO, a aba "Pessoas" e os jogos padrão
+            cliente (ClienteSheets): cliente compartilhado entre os eventos. Sem ele, um novo é criado
+
         Observação:
 
         - As API's e serviços do Bot estão disponíveis, a partir da conta "petcomp@icmc.usp.br" no link:
@@ -31,104 +75,614 @@ class SheetsBot:
         chupacubov2@chupacubo-1602412127381.iam.gserviceaccount.com
         """
 
-        creds_path = Path(__file__).parent.parent.parent / "lib" / "credentials.json"
-        self.creds = gspread.service_account(filename=str(creds_path))
+        self._trava = threading.RLock()
+        # Só uma leitura da planilha por vez; ela é feita sem segurar self._trava
+        self._trava_leitura = threading.Lock()
+        lib_path = Path(__file__).parent.parent.parent / "lib"
+        creds_path = lib_path / "credentials.json"
+        load_dotenv(lib_path / ".env")
+        self.evento = evento or {
+            "nome": "padrao",
+            "planilha": os.getenv("LINK_GOOGLE_SHEET_PONTUACAO"),
+            "aba": "Pessoas",
+            "jogos": list(jogos),
+            "diario": os.getenv("ARQUIVO_DIARIO", str(lib_path / "diario_escritas.jsonl")),
+            "snapshot": os.getenv("ARQUIVO_SNAPSHOT", str(lib_path / "snapshot_planilha.pkl")),
+            "historico": os.getenv("ARQUIVO_HISTORICO", str(lib_path / "historico.sqlite3")),
+        }
+        self.jogos = colunas_jogos(self.evento["jogos"])
+        # Sessão única com a API, com controle de cota e novas tentativas em erros temporários
+        self.cliente = cliente or ClienteSheets.do_ambiente(creds_path)
         self.planilha_alocacao = None
-        self.planilha_alocacao = self.get_sheet_by_name("LINK_GOOGLE_SHEET_PONTUACAO", "Pessoas")
-        self.registros = [r for r in self.planilha_alocacao.get_all_records() if any(str(v).strip() for v in r.values())]
-
-    def recarregar_dados(self):
-        """Recarrega os registros da planilha"""
-        self.planilha_alocacao = self.get_sheet_by_name("LINK_GOOGLE_SHEET_PONTUACAO", "Pessoas")
-        self.registros = [
-            r for r in self.planilha_alocacao.get_all_records() 
-            if any(str(v).strip() for v in r.values())
-        ]
-    def get_sheet_by_name(self, spreadsheet_name, sheet_name):
-            """
-            Lê uma planilha com o id pelo nome da aba
-
-            Argumentos:
-                spreadsheet_id (str): ID da planilha Google Sheets.
-                sheet_name (str): Nome exato da aba/sheet
-
-            Returns:
-                pd.DataFrame: DataFrame com os dados da planilha
-
-            Observação:
-                - O spreadsheet_id é a parte do link que está entre o "d/{spreadsheet_id}/"
-                Por exemplo:
-                    https://docs.google.com/spreadsheets/d/1iztgt38QpdIoMbQguvnwwEMj_oh-F0viRuUVo6v2Uow/edit?gid=305230612#gid=305230612
-                    spreadsheet_id = 1iztgt38QpdIoMbQguvnwwEMj_oh-F0viRuUVo6v2Uow
-            """
+        # Tempo (em segundos) que os registros em memória são considerados válidos
+        self.ttl_cache = float(os.getenv("TTL_CACHE_PLANILHA", 60))
+        self.assincrono = assincrono
+        self.ranking = Ranking(self.jogos)
+        self.busca = IndiceBusca()
+        self.indice = IndiceJogadores(self.ranking, self.busca)
+        self.esquema = EsquemaPlanilha(self.jogos)
+        self._ultima_recarga = None
+        # Indica que já há um estado em memória (da planilha ou do snapshot). Ao contrário de
+        # _ultima_recarga, não volta atrás quando o cache é invalidado
+        self.carregado = False
+        # Indica que o estado em memória já foi conferido com uma leitura completa da planilha.
+        # Antes disso (ex.: carregado do snapshot), jogadores novos não são cadastrados, pois
+        # linhas enviadas depois do snapshot ainda não são conhecidas e os Ids poderiam se repetir
+        self.conferido = False
+        # Entre leituras completas, só as linhas acrescentadas depois da última linha lida são buscadas
+        self.espelho = EspelhoPlanilha()
+        self._linhas_lidas = 0
+        self.intervalo_sincronia_completa = float(os.getenv("SINCRONIA_COMPLETA", 600))
+        self._ultima_sincronia_completa = None
+        # Indica que a última tentativa de ler a planilha falhou e o bot está usando os dados locais
+        self.offline = False
+        # No modo assíncrono, função (sem argumentos) que faz uma leitura forçada da planilha e só
+        # retorna depois de aplicá-la. Definida por quem faz as leituras (ex.: TelegramBotAsync)
+        self.ler_agora = None
+        # Estado em memória guardado em disco de tempos em tempos, para reinícios rápidos e uso offline
+        self.caminho_snapshot = self.evento["snapshot"]
+        self.intervalo_snapshot = float(os.getenv("INTERVALO_SNAPSHOT", 60))
+        self.idade_maxima_snapshot = float(os.getenv("IDADE_MAXIMA_SNAPSHOT", 6 * 3600))
+        self._versao_snapshot = None
+        self._trava_snapshot = threading.Lock()
+        self._encerrado = threading.Event()
 
-            try:
-                # Pega no .env o campo "LINK_GOOGLE_SHEET_XXXX"
-                env_path = Path(__file__).parent.parent.parent / "lib" / ".env"
-                load_dotenv(env_path)
-                spreadsheet_id = os.getenv(spreadsheet_name)
-                # Abre a planilha e a aba específica, criando um dataFrame
-                spreadsheet = self.creds.open_by_key(spreadsheet_id)
-                worksheet = spreadsheet.worksheet(sheet_name)
-
-                # 
-                return worksheet
-
-            # Em caso de não encontrar a aba desejada, printa as disponíveis
-            except gspread.WorksheetNotFound:
-                available_sheets = [ws.title for ws in spreadsheet.worksheets()]
-                raise ValueError(
-                    f"Aba '{sheet_name}' não encontrada. "
-                    f"Abas disponíveis: {', '.join(available_sheets)}"
-                )
-            # Em caso de erro ao acessar a planilha
-            except Exception as e:
-                raise Exception(f"Erro ao acessar a planilha: {str(e)}")
-        
+        # As escritas são respondidas a partir do índice, gravadas no diário e enviadas em lote pela fila.
+        # O que ficou sem confirmação no diário (ex.: o bot caiu) volta para a fila
+        diario = DiarioEscritas(self.evento["diario"])
+        self.fila = FilaEscrita(
+            None,
+            intervalo=float(os.getenv("INTERVALO_FILA_ESCRITA", 2)),
+            limite=int(os.getenv("LIMITE_FILA_ESCRITA", 50)),
+            ao_falhar=self._ao_falhar_escrita,
+            automatica=not assincrono,
+            diario=diario,
+            localizar=self._localizar_jogador,
+            ao_anexar=self._corrigir_linhas_anexadas,
+        )
+        self.fila.restaurar(diario.pendentes())
+
+        # Cada tentativa de pontuação vai para o histórico local, e dele para a aba "Historico" em lotes
+        self.auditoria = Auditoria(
+            self.evento["historico"],
+            aba=lambda: self.cliente.aba(self.evento["planilha"], "Historico", cabecalho=CABECALHO_HISTORICO),
+            intervalo=float(os.getenv("INTERVALO_HISTORICO", 30)),
+        )
+
+        # Com um snapshot recente (ex.: o bot caiu no meio do evento), os comandos são respondidos
+        # desde já, e a planilha é conferida em segundo plano
+        self.iniciado_do_snapshot = self._carregar_snapshot(self.idade_maxima_snapshot)
+        if not assincrono:
+            if self.iniciado_do_snapshot:
+                threading.Thread(target=self.reconciliar, daemon=True).start()
+            else:
+                self.recarregar_dados(forcar=True)
+            if self.intervalo_snapshot > 0:
+                threading.Thread(target=self._gravar_periodicamente, daemon=True).start()
+
+    @property
+    def registros(self):
+        """Registros não vazios da planilha, na ordem das linhas"""
+        return [self.indice.registros[linha] for linha in sorted(self.indice.registros)]
+
+    def recarregar_dados(self, forcar=False):
+        """
+        Recarrega os registros da planilha, caso o cache tenha expirado
+
+        Argumentos:
+            forcar (bool): recarrega mesmo que o cache ainda seja válido
+
+        Observação:
+            - A leitura (com as novas tentativas do ClienteSheets) é feita sem segurar a trava do
+            SheetsBot, que só é pega para aplicar o resultado. Assim, com a planilha lenta ou fora,
+            os outros comandos continuam sendo respondidos com o estado em memória
+            - Só uma leitura acontece por vez. Se já houver uma em andamento, quem já tem dados em
+            memória segue com eles em vez de esperar
+            - Os envios da fila ficam pausados durante a leitura, então toda escrita ou já está
+            na leitura ou ainda está na fila (e é reaplicada sobre ela em aplicar_valores)
+            - No modo assíncrono, só a leitura forçada acontece aqui, via ler_agora
+        """
+        if self.assincrono:
+            # As leituras ficam a cargo de quem usa a classe; só as forçadas são pedidas a ele
+            if forcar and self.ler_agora is not None:
+                self.ler_agora()
+            return
+        if not forcar and not self.cache_expirado():
+            return
+        if not self._trava_leitura.acquire(blocking=forcar or not self.carregado):
+            return
+        try:
+            if not forcar and not self.cache_expirado():
+                return  # outra thread acabou de recarregar
+            with self.fila.pausada():
+                with self._trava:
+                    intervalo = self.intervalo_novas_linhas()
+                try:
+                    aba = self.cliente.aba(self.evento["planilha"], self.evento["aba"])
+                    if intervalo is not None:
+                        # A coluna Id vem junto com as linhas novas, na mesma chamada, para conferir
+                        # se as linhas já lidas continuam no mesmo lugar
+                        ids, valores = aba.batch_get([intervalo[2], intervalo[1]])
+                        with self._trava:
+                            if not self.linhas_conferem(ids):
+                                intervalo = None
+                    if intervalo is None:
+                        valores = aba.get_all_values()
+                except Exception as e:
+                    self.usar_offline(e)
+                    return
+                with self._trava:
+                    self.planilha_alocacao = aba
+                    self.fila.planilha = aba
+                    if intervalo is None:
+                        self.aplicar_valores(valores)
+                    else:
+                        self.aplicar_novas_linhas(intervalo[0], valores)
+        finally:
+            self._trava_leitura.release()
+
+    def reconciliar(self):
+        """
+        Confere o estado carregado do snapshot com uma leitura completa da planilha, enquanto os
+        comandos continuam sendo respondidos (ver recarregar_dados)
+        """
+        self.recarregar_dados(forcar=True)
+
+    def intervalo_novas_linhas(self):
+        """
+        Decide entre uma leitura completa e uma incremental (só as linhas novas)
+
+        Returns:
+            tuple: (primeira linha, intervalo A1 a partir dela, intervalo A1 da coluna Id), ou None
+            quando é hora de uma leitura completa
+
+        Observação:
+            - A leitura completa acontece a cada SINCRONIA_COMPLETA segundos (0 = sempre), pois
+            só ela enxerga alterações feitas direto na planilha no conteúdo das linhas já lidas
+            e no cabeçalho
+            - A coluna Id é lida em toda leitura incremental (ver linhas_conferem), pois linhas
+            apagadas, inseridas ou reordenadas mudam a linha de cada jogador
+            - Depois de ficar offline ou de uma escrita falhar, a próxima leitura é sempre completa
+        """
+        if (
+            self.offline
+            or self.espelho.vazio
+            or "Id" not in self.espelho.cabecalho
+            or self.intervalo_sincronia_completa <= 0
+            or self._ultima_sincronia_completa is None
+            or time.monotonic() - self._ultima_sincronia_completa >= self.intervalo_sincronia_completa
+        ):
+            return None
+        inicio = self._linhas_lidas + 1
+        ultima_coluna = rowcol_to_a1(1, len(self.espelho.cabecalho)).rstrip("0123456789")
+        coluna_id = rowcol_to_a1(1, self.espelho.cabecalho.index("Id") + 1).rstrip("0123456789")
+        return inicio, f"A{inicio}:{ultima_coluna}", f"{coluna_id}2:{coluna_id}"
+
+    @sincronizado
+    def linhas_conferem(self, ids):
+        """
+        Confere a coluna Id da planilha com a da última leitura
+
+        Argumentos:
+            ids (list): coluna Id a partir da linha 2, como lida pela API (uma lista por linha,
+            vazia quando a célula está vazia)
+
+        Returns:
+            bool: False se linhas já lidas foram apagadas, inseridas ou reordenadas direto na
+            planilha, e a leitura precisa ser completa
+        """
+        esperados = self.espelho.colunas[self.espelho.cabecalho.index("Id")][:self._linhas_lidas - 1]
+        lidos = [str(linha[0]).strip() if linha else "" for linha in ids[:len(esperados)]]
+        lidos += [""] * (len(esperados) - len(lidos))
+        if lidos == [str(valor).strip() for valor in esperados]:
+            return True
+        metricas.contar("planilha.linhas_mudaram")
+        print("Linhas da planilha foram apagadas, inseridas ou reordenadas. Relendo a planilha inteira...")
+        return False
+
+    @sincronizado
+    def usar_offline(self, erro):
+        """
+        Chamado quando a planilha não pôde ser lida: o bot continua respondendo com o estado em
+        memória ou, se ainda não houver um, com o último snapshot local somado ao diário
+
+        Observação:
+            - Uma nova tentativa de leitura só acontece quando o cache expirar de novo
+            - O snapshot só é usado antes do primeiro carregamento: depois dele, o estado em
+            memória é sempre mais novo que o snapshot
+        """
+        print(f"Planilha inacessível ({erro}). Usando os dados locais...")
+        if not self.carregado and not self._carregar_snapshot():
+            raise erro
+        self._ultima_recarga = time.monotonic()
+        self.offline = True
+
+    @sincronizado
+    def _carregar_snapshot(self, idade_maxima=None):
+        """
+        Carrega o estado gravado por gravar_snapshot(), somado às escritas restauradas do diário
+
+        Argumentos:
+            idade_maxima (float): ignora snapshots mais antigos que isso (em segundos); None aceita qualquer idade
+
+        Returns:
+            bool: True se o estado foi carregado
+
+        Observação:
+            - Nunca substitui um estado já carregado (ver usar_offline)
+        """
+        if self.carregado:
+            return False
+        dados = snapshot.ler(self.caminho_snapshot)
+        if dados is None or dados["espelho"].vazio:
+            return False
+        if idade_maxima is not None and time.time() - dados["salvo_em"] > idade_maxima:
+            return False
+
+        indice = dados["indice"]
+        if dados["jogos"] != self.evento["jogos"]:
+            # Snapshot de outros jogos: os índices (e o ranking) são refeitos a partir da cópia da aba
+            self.aplicar_valores(dados["espelho"].valores(), salvar_snapshot=False)
+        else:
+            # O contador de Ids nunca volta atrás (ex.: Ids já vistos nas escritas restauradas do diário)
+            indice.ids.observar(self.indice.ids.ultimo)
+            self.indice, self.ranking, self.busca = indice, indice.ranking, indice.busca
+            self.espelho = dados["espelho"]
+            self.esquema.carregar(self.espelho.cabecalho)
+            self._linhas_lidas = dados["linhas_lidas"]
+            self._aplicar_pendentes()
+            self._ultima_recarga = time.monotonic()
+        self._versao_snapshot = self.indice.versao
+        self.carregado = True
+        return True
+
+    def _aplicar_pendentes(self):
+        """Aplica no índice as escritas da fila, que podem ser mais novas que o snapshot"""
+        linhas, celulas = self.fila.pendencias()
+        for valores_linha in linhas:
+            registro = self._registro([str(valor) for valor in valores_linha])
+            if registro is not None and self.indice.buscar(id=registro.get("Id"))[0] is None:
+                self.indice.adicionar(self.indice.ultima_linha + 1, registro)
+        cabecalho = self.espelho.cabecalho
+        for (jogador, coluna), valor in celulas.items():
+            linha = self._localizar_jogador(jogador)
+            if linha in self.indice.registros and coluna <= len(cabecalho):
+                self.indice.atualizar(linha, cabecalho[coluna - 1], valor)
+
+    def gravar_snapshot(self, forcar=False):
+        """
+        Grava em disco o estado em memória (registros, índices e ranking), se ele mudou desde a última gravação
+
+        Returns:
+            bool: True se o snapshot foi gravado
+        """
+        with self._trava:
+            if self.espelho.vazio or (not forcar and self.indice.versao == self._versao_snapshot):
+                return False
+            dados = snapshot.serializar(self.espelho, self.indice, self.evento["jogos"], self._linhas_lidas)
+            versao = self.indice.versao
+        # A gravação em disco fica fora da trava do SheetsBot, para não atrasar os comandos
+        with self._trava_snapshot:
+            if not snapshot.gravar(self.caminho_snapshot, dados):
+                return False
+            self._versao_snapshot = versao
+        return True
+
+    def _gravar_periodicamente(self):
+        while not self._encerrado.wait(self.intervalo_snapshot):
+            self.gravar_snapshot()
+
+    @sincronizado
+    def aplicar_valores(self, valores, salvar_snapshot=True):
+        """
+        Atualiza o estado em memória a partir de uma leitura completa da aba
+
+        Argumentos:
+            valores (list): linhas da aba (incluindo o cabeçalho), como em get_all_values()
+            salvar_snapshot (bool): indica uma leitura da planilha (e não do snapshot local), que é
+            guardada em disco para uso caso a planilha fique inacessível
+
+        Observação:
+            - Só as linhas diferentes da leitura anterior são reindexadas; o índice inteiro só é
+            refeito na primeira leitura ou quando o cabeçalho muda
+        """
+        # As escritas que ainda estão na fila não aparecem na leitura, então são reaplicadas
+        valores = [list(linha) for linha in valores]
+        lidas = len(valores)
+        if valores:
+            self.fila.sobrepor(valores, self._colunas_chave(valores[0]))
+
+        # O cabeçalho vem na mesma leitura, então o esquema é revalidado sem custo extra
+        cabecalho = valores[0] if valores else []
+        self.esquema.carregar(cabecalho)
+        mudaram = self.espelho.carregar(valores)
+        if mudaram is None:
+            registros = to_records(cabecalho, [numericise_all(linha) for linha in valores[1:]])
+            # As linhas vazias são ignoradas, mas continuam contando na numeração (começa na linha 2)
+            self.indice.reconstruir(
+                (
+                    (linha, r) for linha, r in enumerate(registros, start=2)
+                    if any(str(v).strip() for v in r.values())
+                ),
+                ultima_linha=len(registros) + 1,
+            )
+        else:
+            for linha in sorted(mudaram):
+                registro = self._registro(valores[linha - 1]) if linha <= len(valores) else None
+                if registro is None:
+                    self.indice.remover(linha)
+                else:
+                    self.indice.adicionar(linha, registro)
+            self.indice.ultima_linha = max(len(valores), 1)
+
+        self._linhas_lidas = lidas
+        self._ultima_recarga = time.monotonic()
+        self.carregado = True
+        if salvar_snapshot:
+            self.conferido = True
+            self.offline = False
+            self._ultima_sincronia_completa = self._ultima_recarga
+            self.gravar_snapshot()
+
+    @sincronizado
+    def aplicar_novas_linhas(self, inicio, linhas):
+        """
+        Atualiza o estado em memória a partir de uma leitura incremental da aba
+
+        Argumentos:
+            inicio (int): linha da planilha a partir da qual a leitura foi feita
+            linhas (list): linhas lidas a partir de `inicio` (vazia se nada foi acrescentado)
+        """
+        largura = len(self.espelho.cabecalho)
+        linhas = [list(linha) + [""] * (largura - len(linha)) for linha in linhas]
+        lidas = len(linhas)
+        # Linhas pendentes que já aparecem na leitura saem da fila; as demais vão para depois delas
+        self.fila.sobrepor(linhas, self._colunas_chave(self.espelho.cabecalho), inicio=inicio, largura=largura)
+
+        ultima = inicio - 1 + len(linhas)
+        for linha in range(ultima + 1, self.indice.ultima_linha + 1):
+            self.indice.remover(linha)
+        for linha, valores_linha in enumerate(linhas, start=inicio):
+            registro = self._registro(valores_linha)
+            if registro is None:
+                self.indice.remover(linha)
+            else:
+                self.indice.adicionar(linha, registro)
+        self.indice.ultima_linha = ultima
+
+        self.espelho.truncar(inicio - 1)
+        self.espelho.anexar(linhas)
+        self._linhas_lidas = inicio - 1 + lidas
+        self._ultima_recarga = time.monotonic()
+        self.offline = False
+
+    @staticmethod
+    def _colunas_chave(cabecalho):
+        """
+        Colunas (começando em 1) que identificam uma linha pendente já enviada: Id, Nome e Contato
+
+        Observação:
+            - Só o Id não basta: uma linha digitada direto na planilha pode ter recebido o mesmo Id
+            que o bot deu a um jogador novo ainda na fila
+        """
+        if "Id" not in cabecalho:
+            return None
+        return [cabecalho.index(c) + 1 for c in ("Id", "Nome", "Contato (telegram/numero)") if c in cabecalho]
+
+    @sincronizado
+    def _localizar_jogador(self, jogador):
+        """Linha atual de um jogador da fila de escrita (ver FilaEscrita.atualizar_celula), ou None"""
+        if not isinstance(jogador, str):
+            return jogador
+        return self.indice.buscar(id=jogador)[0]
+
+    def _chave_fila(self, linha):
+        """Como as escritas de um jogador entram na fila: pelo Id, ou pela linha se ele não tiver Id"""
+        id = str(self.indice.registros[linha].get("Id", "")).strip()
+        return id or linha
+
+    @sincronizado
+    def _corrigir_linhas_anexadas(self, primeira, linhas):
+        """
+        Move no índice os jogadores novos para as linhas onde o append_rows de fato os colocou
+
+        Argumentos:
+            primeira (int): linha da planilha onde ficou a primeira linha enviada
+            linhas (list): linhas enviadas, na ordem
+
+        Observação:
+            - O bot indexa cada jogador novo na linha seguinte à última conhecida. Se linhas foram
+            digitadas direto na planilha desde a última leitura, ele foi parar mais abaixo
+            - Só são movidos registros que o bot colocou depois das linhas lidas, e a próxima
+            consulta relê as linhas novas, incluindo as digitadas
+        """
+        cabecalho = self.esquema.cabecalho or []
+        if "Id" not in cabecalho:
+            return
+        coluna_id = cabecalho.index("Id")
+        movidos = []
+        for deslocamento, valores_linha in enumerate(linhas):
+            linha, registro = self.indice.buscar(id=valores_linha[coluna_id])
+            if linha is not None and linha > self._linhas_lidas and linha != primeira + deslocamento:
+                movidos.append((linha, primeira + deslocamento, registro))
+        if not movidos:
+            return
+        metricas.contar("planilha.linhas_anexadas_deslocadas")
+        print(f"Linhas novas foram parar a partir da linha {primeira}. Corrigindo o índice...")
+        for linha, _, _ in movidos:
+            self.indice.remover(linha)
+        for _, linha, registro in movidos:
+            self.indice.adicionar(linha, registro)
+        self._ultima_recarga = None
+
+    def _registro(self, valores_linha):
+        """Converte uma linha da aba em registro (dict), ou None se a linha estiver vazia"""
+        registro = dict(zip(self.espelho.cabecalho, numericise_all(valores_linha)))
+        return registro if any(str(v).strip() for v in registro.values()) else None
+
+    def cache_expirado(self):
+        """Indica se os registros em memória precisam ser recarregados da planilha"""
+        if self._ultima_recarga is None:
+            return True
+        return time.monotonic() - self._ultima_recarga >= self.ttl_cache
+
+    def invalidar_cache(self):
+        """Força que a próxima consulta recarregue (por completo) os registros da planilha"""
+        self._ultima_recarga = None
+        self._ultima_sincronia_completa = None
+
+    def _garantir_esquema(self):
+        """Lê o cabeçalho da planilha apenas se ele ainda não estiver resolvido"""
+        if not self.esquema.valido:
+            self.esquema.carregar(self.planilha_alocacao.row_values(1))
+        return self.esquema
+
+    def _ao_falhar_escrita(self, erro):
+        """
+        Uma escrita que falha pode indicar que a estrutura da planilha mudou, então a próxima
+        consulta relê a planilha inteira, e o cabeçalho vindo nessa leitura revalida o esquema. Offline isso é evitado, pois cada tentativa
+        de leitura travaria os comandos até o timeout
+
+        Observação:
+            - A cota estourada (429) não diz nada sobre a estrutura da planilha; reler tudo nesse
+            caso só gastaria mais cota
+        """
+        if getattr(erro, "code", None) == 429:
+            return
+        if not self.offline:
+            self.invalidar_cache()
+
+    def encerrar(self):
+        """
+        Envia todas as escritas pendentes à planilha, grava o snapshot e envia o histórico.
+        Deve ser chamado ao desligar o bot
+        """
+        self._encerrado.set()
+        try:
+            self.fila.encerrar()
+        except Exception as e:
+            print(f"Erro ao enviar escritas: {e}. Elas serão reenviadas a partir do diário ao reiniciar")
+        self.gravar_snapshot()
+        self.auditoria.encerrar()
+
+    @com_dados_recentes
     def buscar_jogador(self, id=None, nome=None, contato=None):
-        self.recarregar_dados()
-        for i, registro in enumerate(self.registros, start=2):  # começa na linha 2
-            if id is not None and str(registro.get("Id")) == str(id):
-                return i, registro
-            elif nome and contato:
-                if (
-                    str(registro.get("Nome")).strip().lower() == str(nome).strip().lower()
-                    or str(registro.get("Contato (telegram/numero)")).strip() == str(contato).strip()
-                ):                    
-                    return i, registro
-        return None, None  # não encontrado
-
-    def atualizar_pontuacao(self, linha, coluna_pontos, coluna_timestamp, nova_pontuacao, horario, monitor):
-        """Atualiza a pontuação e timestamp de uma linha existente"""
-        self.planilha_alocacao.update_cell(linha, coluna_pontos, float(nova_pontuacao))
-        self.planilha_alocacao.update_cell(linha, coluna_timestamp, f"{horario}")
-
-    def addPlayer(self, id=None, nome=None, contato=None, jogo=None, pontuacao=None, monitor=None, horario=None):
-        colunas_pontos = {
-            "Touhou": "Pontuação (Touhou)",
-            "Guitar Hero": "Pontuação (Guitar Hero)",
-            "Chicken": "Pontuação (Chicken)",
-            "Tetris": "Pontuação (Tetris)"
-        }
-        colunas_timestamp = {
-            "Touhou": "Timestamp (Touhou)",
-            "Guitar Hero": "Timestamp (Guitar Hero)",
-            "Chicken": "Timestamp (Chicken)",
-            "Tetris": "Timestamp (Tetris)"
-        }
+        """Busca o jogador no índice em memória, retornando (linha, registro) ou (None, None)"""
+        return self.indice.buscar(id, nome, contato)
+
+    @com_dados_recentes
+    def consultar_jogador(self, id=None, nome=None, contato=None):
+        """
+        Busca o jogador junto com a versão do seu registro, lidos de uma só vez
 
-        coluna_pontos = colunas_pontos[jogo]
-        coluna_timestamp = colunas_timestamp[jogo]
-        cabecalho = self.planilha_alocacao.row_values(1)
-        col_idx_pontos = cabecalho.index(coluna_pontos) + 1
-        col_idx_timestamp = cabecalho.index(coluna_timestamp) + 1
+        Returns:
+            tuple: (linha, cópia do registro, versão do registro) ou (None, None, None)
 
-        linha_existente, jogador_atual = self.buscar_jogador(id, nome, contato)
+        Observação:
+            - A versão identifica o conteúdo da cópia (ver IndiceJogadores.versao_registro), então
+            pode ser usada como chave de cache da resposta
+        """
+        linha, registro = self.indice.buscar(id, nome, contato)
+        if linha is None:
+            return None, None, None
+        return linha, dict(registro), self.indice.versao_registro(linha)
+
+    @com_dados_recentes
+    def buscar_parecidos(self, consulta, n=5):
+        """
+        Busca aproximada por Nome ou Contato (sem acentos, com erros de digitação ou pela metade)
+
+        Returns:
+            list: tuplas (linha, registro, semelhança), do mais para o menos parecido
+        """
+        return [(linha, self.indice.registros[linha], nota) for linha, nota in self.busca.buscar(consulta, n)]
+
+    def _possiveis_duplicados(self, nome, contato):
+        """
+        Jogadores já cadastrados parecidos com o Nome e o Contato informados
+
+        Returns:
+            tuple: (jogadores com Nome e Contato parecidos, jogadores com só um dos dois parecido)
+        """
+        encontrados = []
+        for valor in (nome, contato):
+            linhas = set()
+            if valor:
+                linhas.update(linha for linha, _ in self.busca.buscar(valor, minimo=LIMIAR_DUPLICADO, prefixos=False))
+            encontrados.append(linhas)
+        ambos = encontrados[0] & encontrados[1]
+        algum = (encontrados[0] | encontrados[1]) - ambos
+        return (
+            [self.indice.registros[linha] for linha in sorted(ambos)],
+            [self.indice.registros[linha] for linha in sorted(algum)],
+        )
+
+    @com_dados_recentes
+    def consultar_ranking(self, jogo, n=10):
+        """
+        Retorna os n melhores jogadores de um jogo, a partir do ranking em memória
+
+        Returns:
+            list: pares (registro, pontos), do maior para o menor
+        """
+        return [(self.indice.registros[linha], pontos) for linha, pontos in self.ranking.top(jogo, n)]
+
+    def atualizar_pontuacao(self, linha, coluna_pontos, coluna_timestamp, nova_pontuacao, horario):
+        """Agenda a atualização da pontuação e timestamp de uma linha existente (o monitor fica no histórico)"""
+        jogador = self._chave_fila(linha)
+        self.fila.atualizar_celula(jogador, coluna_pontos, float(nova_pontuacao))
+        self.fila.atualizar_celula(jogador, coluna_timestamp, f"{horario}")
+
+    def _atualizar_local(self, linha, campos):
+        """Aplica no índice em memória as alterações feitas pelo próprio bot na planilha"""
+        if linha in self.indice.registros:
+            for campo, valor in campos.items():
+                self.indice.atualizar(linha, campo, valor)
+
+    def _registrar_pontuacao(self, id, nome, contato, jogo, pontuacao, monitor, horario, forcar_novo=False,
+                             mensagem_id=None):
+        """
+        Registra uma tentativa de pontuação, só aumentando a pontuação se a nova for maior
+
+        Argumentos:
+            forcar_novo (bool): cadastra o jogador novo mesmo que existam jogadores parecidos
+            mensagem_id (int): id da mensagem do Telegram com o comando, guardado no histórico
+
+        Returns:
+            dict: "situacao" ("atualizado", "mantido", "novo", "duplicado" ou "erro") e os dados para a resposta
+
+        Observação:
+            - Toda tentativa, com qualquer resultado, fica registrada no histórico (auditoria)
+        """
+        r = self._pontuar(id, nome, contato, jogo, pontuacao, horario, forcar_novo)
+        self.auditoria.registrar(
+            horario=horario,
+            jogador_id=r.get("id", id),
+            nome=r.get("nome") or nome,
+            jogo=jogo,
+            pontos_antigos=r.get("pontos_atuais"),
+            pontos_novos=pontuacao,
+            monitor=monitor,
+            mensagem_id=mensagem_id,
+            comando="novo" if forcar_novo else "add",
+            situacao=f"erro: {r['erro']}" if r["situacao"] == "erro" else r["situacao"],
+        )
+        return r
+
+    def _pontuar(self, id, nome, contato, jogo, pontuacao, horario, forcar_novo):
+        """Aplica a tentativa de pontuação no índice e na fila de escrita (ver _registrar_pontuacao)"""
+        esquema = self._garantir_esquema()
+        try:
+            coluna_pontos, coluna_timestamp, col_idx_pontos, col_idx_timestamp = esquema.colunas_jogo(jogo)
+        except ValueError as e:
+            return {"situacao": "erro", "erro": f"{e}"}
+
+        linha_existente, jogador_atual = self.indice.buscar(id, nome, contato)
 
         try:
             nova_pontuacao = float(pontuacao)
         except ValueError:
-            return f"❌ **Pontuação inválida:** `{pontuacao}`"
+            return {"situacao": "erro", "erro": f"Pontuação inválida: `{pontuacao}`"}
 
         if linha_existente:
             pontos_atuais = jogador_atual.get(coluna_pontos, 0) or 0
@@ -137,68 +691,230 @@ class SheetsBot:
             except ValueError:
                 pontos_atuais = 0.0
 
+            resultado = {
+                "nome": nome or jogador_atual.get("Nome"),
+                "id": jogador_atual.get("Id"),
+                "pontos_atuais": pontos_atuais,
+                "nova_pontuacao": nova_pontuacao,
+            }
             if nova_pontuacao > pontos_atuais:
-                self.atualizar_pontuacao(linha_existente, col_idx_pontos, col_idx_timestamp, nova_pontuacao, horario, monitor)
-                return (
-                    f"🏆 **Parabéns, {nome or jogador_atual.get('Nome')}!**\n"
-                    f"🎮 Jogo: {jogo}\n"
-                    f"⬆️ Pontos antigos: {pontos_atuais}\n"
-                    f"✨ Pontos novos: {nova_pontuacao}\n"
-                    f"🕒 Atualizado por @{monitor} às {horario}"
-                )
+                self.atualizar_pontuacao(linha_existente, col_idx_pontos, col_idx_timestamp, nova_pontuacao, horario)
+                self._atualizar_local(linha_existente, {coluna_pontos: nova_pontuacao, coluna_timestamp: f"{horario}"})
+                resultado["situacao"] = "atualizado"
             else:
-                return (
-                    f"⚠️ **Nada mudou para {nome or jogador_atual.get('Nome')}**\n"
-                    f"🎮 Jogo: {jogo}\n"
-                    f"Pontuação atual: {pontos_atuais}\n"
-                    f"Tentativa de registro: {nova_pontuacao} (não foi suficiente para atualizar)"
-                )
-        else:
-            novo_id = len(self.registros) + 1
-            nova_linha = [novo_id, nome or "", contato or "", "", "", "", "", "", "", "", ""]
-            nova_linha[col_idx_pontos - 1] = nova_pontuacao
-            nova_linha[col_idx_timestamp - 1] = f"{horario}"
-            self.planilha_alocacao.append_row(nova_linha)
+                resultado["situacao"] = "mantido"
+            return resultado
+
+        # Sem conferir a planilha, o próximo Id pode já ter sido usado por uma linha enviada depois do snapshot
+        if not self.conferido:
+            return {
+                "situacao": "erro",
+                "erro": f"A planilha ainda está sendo conferida após o reinício; cadastre {nome} de novo em alguns instantes",
+            }
+
+        # Nome e Contato digitados com erro ou sem acento não podem virar um segundo cadastro do mesmo
+        # jogador. Se só um dos dois for parecido (ex.: nomes comuns), o jogador é cadastrado com um aviso
+        semelhantes = []
+        if not forcar_novo:
+            parecidos, semelhantes = self._possiveis_duplicados(nome, contato)
+            if parecidos:
+                return {"situacao": "duplicado", "nome": nome, "contato": contato, "parecidos": parecidos}
+
+        # Ids sequenciais a partir do maior existente: linhas vazias ou apagadas não causam repetição
+        novo_id = self.indice.ids.alocar()
+        nova_linha = esquema.linha_vazia()
+        nova_linha[esquema.coluna("Id") - 1] = novo_id
+        nova_linha[esquema.coluna("Nome") - 1] = nome or ""
+        nova_linha[esquema.coluna("Contato (telegram/numero)") - 1] = contato or ""
+        nova_linha[col_idx_pontos - 1] = nova_pontuacao
+        nova_linha[col_idx_timestamp - 1] = f"{horario}"
+        self.fila.adicionar_linha(nova_linha)
+        self.indice.adicionar(self.indice.ultima_linha + 1, dict(zip(esquema.cabecalho, nova_linha)))
+        return {
+            "situacao": "novo",
+            "nome": nome,
+            "contato": contato,
+            "id": novo_id,
+            "nova_pontuacao": nova_pontuacao,
+            "semelhantes": semelhantes,
+        }
+
+    def _conferir_novas_linhas(self, tentativas):
+        """
+        Lê as linhas acrescentadas à planilha antes de cadastrar jogadores novos, para que o Id
+        alocado não repita o de uma linha digitada direto na planilha desde a última leitura
+
+        Argumentos:
+            tentativas (list): tuplas (id, nome, contato) das pontuações do comando
+
+        Observação:
+            - Só lê se alguma tentativa é de um jogador ainda não indexado; a leitura costuma ser
+            incremental (ver intervalo_novas_linhas) e é feita sem segurar a trava
+            - Offline (ou antes de conferir a planilha) não lê: cada tentativa travaria o comando
+            até o timeout, e o cadastro já é recusado até a planilha ser conferida
+        """
+        if self.offline or not self.conferido:
+            return
+        with self._trava:
+            novo = any(self.indice.buscar(id, nome, contato)[0] is None for id, nome, contato in tentativas)
+        if novo:
+            self.recarregar_dados(forcar=True)
+
+    def addPlayer(self, id=None, nome=None, contato=None, jogo=None, pontuacao=None, monitor=None, horario=None,
+                  forcar_novo=False, mensagem_id=None):
+        self._conferir_novas_linhas([(id, nome, contato)])
+        return self._addPlayer(id, nome, contato, jogo, pontuacao, monitor, horario, forcar_novo, mensagem_id)
+
+    @com_dados_recentes
+    def _addPlayer(self, id, nome, contato, jogo, pontuacao, monitor, horario, forcar_novo, mensagem_id):
+        r = self._registrar_pontuacao(id, nome, contato, jogo, pontuacao, monitor, horario, forcar_novo, mensagem_id)
+
+        if r["situacao"] == "erro":
+            return f"❌ **{r['erro']}**"
+        if r["situacao"] == "atualizado":
+            return (
+                f"🏆 **Parabéns, {r['nome']}!**\n"
+                f"🎮 Jogo: {jogo}\n"
+                f"⬆️ Pontos antigos: {r['pontos_atuais']}\n"
+                f"✨ Pontos novos: {r['nova_pontuacao']}\n"
+                f"🕒 Atualizado por @{monitor} às {horario}"
+            )
+        if r["situacao"] == "mantido":
             return (
-                f"🆕 **Novo jogador registrado!**\n"
-                f"🆔 ID: {novo_id}\n"
-                f"👤 Nome: {nome}\n"
-                f"📞 Contato: {contato}\n"
+                f"⚠️ **Nada mudou para {r['nome']}**\n"
                 f"🎮 Jogo: {jogo}\n"
-                f"🏅 Pontuação inicial: {nova_pontuacao}\n"
-                f"🕒 Registrado por @{monitor} às {horario}"
+                f"Pontuação atual: {r['pontos_atuais']}\n"
+                f"Tentativa de registro: {r['nova_pontuacao']} (não foi suficiente para atualizar)"
+            )
+        if r["situacao"] == "duplicado":
+            msg = (
+                f"🤔 **Possível jogador duplicado!**\n"
+                f"{r['nome']} ({r['contato']}) não foi cadastrado, pois parece com:\n"
+            )
+            for jogador in r["parecidos"]:
+                msg += f"• {jogador.get('Nome')} – {jogador.get('Contato (telegram/numero)')} (ID {jogador.get('Id')})\n"
+            msg += (
+                f"\nSe for um deles, use `/add id, {pontuacao}`.\n"
+                f"Se for outra pessoa, use `/novo {r['nome']}, {r['contato']}, {pontuacao}`."
+            )
+            return msg
+        msg = (
+            f"🆕 **Novo jogador registrado!**\n"
+            f"🆔 ID: {r['id']}\n"
+            f"👤 Nome: {r['nome']}\n"
+            f"📞 Contato: {r['contato']}\n"
+            f"🎮 Jogo: {jogo}\n"
+            f"🏅 Pontuação inicial: {r['nova_pontuacao']}\n"
+            f"🕒 Registrado por @{monitor} às {horario}"
+        )
+        if r["semelhantes"]:
+            msg += "\n\n🤔 **Atenção:** parece com jogadores já cadastrados:\n"
+            for jogador in r["semelhantes"]:
+                msg += f"• {jogador.get('Nome')} – {jogador.get('Contato (telegram/numero)')} (ID {jogador.get('Id')})\n"
+            msg += "Confira se não é a mesma pessoa."
+        return msg
+
+    def addPlayers(self, entradas, jogo=None, monitor=None, horario=None, forcar_novo=False, mensagem_id=None):
+        """
+        Registra várias tentativas de pontuação de uma vez (/add com várias linhas)
+
+        Argumentos:
+            entradas (list): tuplas (texto da linha, id, nome, contato, pontuacao). Linhas que não
+            puderam ser interpretadas vêm com id, nome, contato e pontuacao iguais a None
+            forcar_novo (bool): cadastra os jogadores novos mesmo que existam jogadores parecidos
+
+        Returns:
+            str: resumo com os jogadores atualizados, mantidos, novos e os erros por linha
+
+        Observação:
+            - Todas as linhas são resolvidas contra a mesma leitura da planilha e todas as
+            escritas vão para a planilha juntas, em um único envio da fila
+        """
+        self._conferir_novas_linhas([(id, nome, contato) for _, id, nome, contato, pontuacao in entradas if pontuacao is not None])
+        return self._addPlayers(entradas, jogo, monitor, horario, forcar_novo, mensagem_id)
+
+    @com_dados_recentes
+    def _addPlayers(self, entradas, jogo, monitor, horario, forcar_novo, mensagem_id):
+        atualizados, mantidos, novos, avisos, duplicados, erros = [], [], [], [], [], []
+        with self.fila.lote():
+            for numero, (texto, id, nome, contato, pontuacao) in enumerate(entradas, start=1):
+                if pontuacao is None:
+                    erros.append(f"• Linha {numero}: `{texto}` – formato inválido")
+                    continue
+                r = self._registrar_pontuacao(id, nome, contato, jogo, pontuacao, monitor, horario, forcar_novo, mensagem_id)
+                if r["situacao"] == "erro":
+                    erros.append(f"• Linha {numero}: `{texto}` – {r['erro']}")
+                elif r["situacao"] == "atualizado":
+                    atualizados.append(f"• {r['nome']} (ID {r['id']}): {r['pontos_atuais']} → {r['nova_pontuacao']}")
+                elif r["situacao"] == "mantido":
+                    mantidos.append(f"• {r['nome']} (ID {r['id']}): {r['pontos_atuais']} (tentativa: {r['nova_pontuacao']})")
+                elif r["situacao"] == "duplicado":
+                    semelhantes = ", ".join(f"{j.get('Nome')} (ID {j.get('Id')})" for j in r["parecidos"])
+                    duplicados.append(f"• Linha {numero}: `{texto}` – parece com {semelhantes}")
+                else:
+                    novos.append(f"• {r['nome']} (ID {r['id']}): {r['nova_pontuacao']}")
+                    if r["semelhantes"]:
+                        semelhantes = ", ".join(f"{j.get('Nome')} (ID {j.get('Id')})" for j in r["semelhantes"])
+                        avisos.append(f"• Linha {numero}: {r['nome']} (ID {r['id']}) parece com {semelhantes}")
+
+        msg = f"📋 **Registro em lote – {jogo}**\n"
+        for titulo, itens in [
+            ("🏆 **Atualizados**", atualizados),
+            ("⚠️ **Sem mudança**", mantidos),
+            ("🆕 **Novos jogadores**", novos),
+            ("🤔 **Novos parecidos com jogadores cadastrados**", avisos),
+            ("🤔 **Possíveis duplicados (não cadastrados)**", duplicados),
+            ("❌ **Erros**", erros),
+        ]:
+            if itens:
+                msg += f"\n{titulo} ({len(itens)}):\n" + "\n".join(itens) + "\n"
+        if duplicados:
+            msg += "Use `/add id, pontuação` se for o mesmo jogador, ou `/novo nome, contato, pontuação` se não for.\n"
+        msg += f"\n🕒 Registrado por @{monitor} às {horario}"
+        return msg
+
+    @com_dados_recentes
+    def ajustarPontuacao(self, id=None, nome=None, contato=None, jogo=None, nova_pontuacao=None, monitor=None, horario=None,
+                         mensagem_id=None):
+        def auditar(situacao, jogador=None, pontos_antigos=None):
+            self.auditoria.registrar(
+                horario=horario, jogador_id=jogador.get("Id") if jogador else id,
+                nome=nome or (jogador.get("Nome") if jogador else None), jogo=jogo,
+                pontos_antigos=pontos_antigos, pontos_novos=nova_pontuacao, monitor=monitor,
+                mensagem_id=mensagem_id, comando="ajuste", situacao=situacao,
             )
 
-    def ajustarPontuacao(self, id=None, nome=None, contato=None, jogo=None, nova_pontuacao=None, monitor=None, horario=None):
-        linha_existente, jogador_atual = self.buscar_jogador(id, nome, contato)
+        linha_existente, jogador_atual = self.indice.buscar(id, nome, contato)
         if not linha_existente:
+            auditar("erro: jogador não encontrado")
             return f"❌ **Jogador não encontrado.**"
 
-        colunas_pontos = {
-            "Touhou": "Pontuação (Touhou)",
-            "Guitar Hero": "Pontuação (Guitar Hero)",
-            "Chicken": "Pontuação (Chicken)",
-            "Tetris": "Pontuação (Tetris)"
-        }
-        colunas_timestamp = {
-            "Touhou": "Timestamp (Touhou)",
-            "Guitar Hero": "Timestamp (Guitar Hero)",
-            "Chicken": "Timestamp (Chicken)",
-            "Tetris": "Timestamp (Tetris)"
-        }
+        esquema = self._garantir_esquema()
+        try:
+            coluna_pontos, coluna_timestamp, col_idx_pontos, col_idx_timestamp = esquema.colunas_jogo(jogo)
+        except ValueError as e:
+            auditar(f"erro: {e}", jogador_atual)
+            return f"❌ **{e}**"
+        # O ajuste sobrescreve a pontuação, então a anterior só fica guardada no histórico
+        pontos_antigos = jogador_atual.get(coluna_pontos)
 
-        cabecalho = self.planilha_alocacao.row_values(1)
-        coluna_pontos = colunas_pontos[jogo]
-        coluna_timestamp = colunas_timestamp[jogo]
-        col_idx_pontos = cabecalho.index(coluna_pontos) + 1
-        col_idx_timestamp = cabecalho.index(coluna_timestamp) + 1
+        # A pontuação é conferida antes de qualquer escrita, para não deixar um ajuste pela metade
+        try:
+            float(nova_pontuacao)
+        except (TypeError, ValueError):
+            auditar("erro: pontuação inválida", jogador_atual, pontos_antigos)
+            return f"❌ **Pontuação inválida: `{nova_pontuacao}`**"
 
         if id is not None:
             if nome is not None and contato is not None:
-                self.planilha_alocacao.update_cell(linha_existente, cabecalho.index("Nome") + 1, f"{nome}")
-                self.planilha_alocacao.update_cell(linha_existente,  cabecalho.index("Contato (telegram/numero)") + 1, f"{contato}")
+                jogador = self._chave_fila(linha_existente)
+                self.fila.atualizar_celula(jogador, esquema.coluna("Nome"), f"{nome}")
+                self.fila.atualizar_celula(jogador, esquema.coluna("Contato (telegram/numero)"), f"{contato}")
+                self._atualizar_local(linha_existente, {"Nome": f"{nome}", "Contato (telegram/numero)": f"{contato}"})
 
-        self.atualizar_pontuacao(linha_existente, col_idx_pontos, col_idx_timestamp, nova_pontuacao, horario, monitor)
+        self.atualizar_pontuacao(linha_existente, col_idx_pontos, col_idx_timestamp, nova_pontuacao, horario)
+        self._atualizar_local(linha_existente, {coluna_pontos: float(nova_pontuacao), coluna_timestamp: f"{horario}"})
+        auditar("ajustado", jogador_atual, pontos_antigos)
 
         return (
             f"🛠️ **Pontuação ajustada com sucesso!**\n"
@@ -0,0 +1,176 @@
+import asyncio
+import random
+from urllib.parse import quote
+
+import aiohttp
+from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import Request
+
+from src.modules.metricas import metricas
+from src.modules.cliente_sheets import BaldeTokens
+
+##########################################################
+# CLIENTE ASSÍNCRONO DA API DO GOOGLE SHEETS             #
+##########################################################
+
+URL_API = "https://sheets.googleapis.com/v4/spreadsheets"
+ESCOPOS = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+class ErroApiSheets(Exception):
+    def __init__(self, code, mensagem):
+        """Resposta de erro da API, com o status HTTP em `code` (como no gspread.exceptions.APIError)"""
+        super().__init__(f"Erro ao acessar a planilha: [{code}] {mensagem}")
+        self.code = code
+
+
+def erro_temporario(erro, idempotente=True):
+    """
+    Indica se vale a pena tentar de novo (cota estourada, erro do servidor ou falha de rede)
+
+    Observação:
+        - Mesmas regras do erro_temporario do ClienteSheets: em chamadas não idempotentes
+        (ex.: append), só a cota estourada (429) é repetida
+    """
+    if isinstance(erro, ErroApiSheets):
+        return erro.code == 429 or (idempotente and erro.code >= 500)
+    return idempotente and isinstance(erro, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class ClienteSheetsAsync:
+    def __init__(self, creds_path, spreadsheet_id, sheet_name, timeout=10, conexoes=10, leituras=None,
+                 escritas=None, tentativas_leitura=3, tentativas_escrita=5):
+        """
+        Acessa uma aba do Google Sheets pela API REST usando aiohttp
+
+        Argumentos:
+            creds_path (str): caminho do credentials.json da conta de serviço
+            spreadsheet_id (str): ID da planilha Google Sheets
+            sheet_name (str): nome exato da aba/sheet
+            timeout (float): tempo máximo (em segundos) de cada requisição
+            conexoes (int): quantidade máxima de conexões abertas ao mesmo tempo
+            leituras (BaldeTokens): cota de leituras, que pode ser compartilhada entre clientes
+            escritas (BaldeTokens): cota de escritas, que pode ser compartilhada entre clientes
+            tentativas_leitura (int): tentativas de cada leitura antes de desistir
+            tentativas_escrita (int): tentativas de cada escrita antes de desistir
+
+        Observação:
+            - A sessão HTTP é reaproveitada entre as requisições (keep-alive)
+            - Os métodos imitam os do gspread.Worksheet usados pelo SheetsBot
+            - Deve ser criado dentro do event loop em que será usado
+            - Como no ClienteSheets, cada requisição espera a cota e os erros temporários (429,
+            5xx, rede) são repetidos com backoff exponencial e jitter, sem bloquear o event loop.
+            Não há coalescência de leituras: o TelegramBotAsync já faz uma leitura por vez por evento
+        """
+        self.creds = Credentials.from_service_account_file(str(creds_path), scopes=ESCOPOS)
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.conexoes = conexoes
+        self.leituras = leituras or BaldeTokens(60)
+        self.escritas = escritas or BaldeTokens(60)
+        self.tentativas_leitura = tentativas_leitura
+        self.tentativas_escrita = tentativas_escrita
+        self._sessao = None
+        self._trava_token = asyncio.Lock()
+
+    async def _cabecalhos(self):
+        # A renovação do token usa requests (bloqueante), então roda em outra thread
+        async with self._trava_token:
+            if not self.creds.valid:
+                await asyncio.to_thread(self.creds.refresh, Request())
+        return {"Authorization": f"Bearer {self.creds.token}"}
+
+    async def _sessao_http(self):
+        if self._sessao is None or self._sessao.closed:
+            self._sessao = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.conexoes),
+            )
+        return self._sessao
+
+    async def _consumir(self, balde):
+        """Espera (sem bloquear o event loop) até haver cota para uma requisição"""
+        esperado = 0.0
+        while True:
+            espera = balde.reservar()
+            if espera == 0:
+                break
+            await asyncio.sleep(espera)
+            esperado += espera
+        if esperado > 0:
+            metricas.contar("sheets.esperas_cota")
+            metricas.registrar("sheets.espera_cota", esperado)
+
+    async def _requisitar(self, operacao, metodo, caminho, escrita=False, idempotente=True, **kwargs):
+        balde = self.escritas if escrita else self.leituras
+        tentativas = self.tentativas_escrita if escrita else self.tentativas_leitura
+        url = f"{URL_API}/{self.spreadsheet_id}{caminho}"
+        for tentativa in range(tentativas):
+            await self._consumir(balde)
+            try:
+                sessao = await self._sessao_http()
+                cabecalhos = await self._cabecalhos()
+                with metricas.medir(f"sheets.{operacao}"):
+                    async with sessao.request(metodo, url, headers=cabecalhos, **kwargs) as resposta:
+                        if resposta.status >= 400:
+                            raise ErroApiSheets(resposta.status, await resposta.text())
+                        return await resposta.json()
+            except Exception as e:
+                if isinstance(e, ErroApiSheets) and e.code == 429:
+                    metricas.contar("sheets.cota_estourada")
+                if not erro_temporario(e, idempotente) or tentativa == tentativas - 1:
+                    raise
+                espera = min(32.0, 2 ** tentativa) + random.uniform(0, 1)
+                print(f"Erro temporário na planilha ({e}). Tentando novamente em {espera:.1f}s...")
+                metricas.contar("sheets.retentativas")
+                await asyncio.sleep(espera)
+
+    def _referencia(self, a1=None):
+        """Monta a referência A1 da aba (ex.: 'Pessoas'!B3)"""
+        aba = "'" + self.sheet_name.replace("'", "''") + "'"
+        return f"{aba}!{a1}" if a1 else aba
+
+    async def get_all_values(self):
+        """Lê todas as linhas da aba, completando as linhas curtas com células vazias"""
+        dados = await self._requisitar("get_all_values", "GET", f"/values/{quote(self._referencia(), safe='')}")
+        valores = dados.get("values", [])
+        largura = max((len(linha) for linha in valores), default=0)
+        return [linha + [""] * (largura - len(linha)) for linha in valores]
+
+    async def batch_get(self, ranges):
+        """Lê vários intervalos A1 da aba em uma única requisição, sem completar as linhas curtas"""
+        parametros = [("ranges", self._referencia(intervalo)) for intervalo in ranges]
+        dados = await self._requisitar("batch_get", "GET", "/values:batchGet", params=parametros)
+        return [faixa.get("values", []) for faixa in dados.get("valueRanges", [])]
+
+    async def batch_update(self, data, value_input_option="USER_ENTERED"):
+        """Atualiza vários intervalos da aba em uma única requisição"""
+        corpo = {
+            "valueInputOption": value_input_option,
+            "data": [
+                {"range": self._referencia(item["range"]), "values": item["values"]}
+                for item in data
+            ],
+        }
+        return await self._requisitar("batch_update", "POST", "/values:batchUpdate", escrita=True, json=corpo)
+
+    async def append_rows(self, values, value_input_option="RAW"):
+        """Adiciona linhas ao final da tabela da aba em uma única requisição"""
+        return await self._requisitar(
+            "append_rows",
+            "POST",
+            f"/values/{quote(self._referencia('A1'), safe='')}:append",
+            escrita=True,
+            idempotente=False,
+            params={"valueInputOption": value_input_option},
+            json={"values": values},
+        )
+
+    async def fechar(self):
+        """Fecha a sessão HTTP"""
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
@@ -0,0 +1,129 @@
+import argparse
+import csv
+import os
+import pickle
+import time
+
+##########################################################
+# SNAPSHOT LOCAL DO ESTADO DOS JOGADORES                 #
+##########################################################
+
+# Muda quando o formato do snapshot muda; snapshots de outra versão são ignorados
+VERSAO_SNAPSHOT = 2
+
+
+def serializar(espelho, indice, jogos, linhas_lidas):
+    """
+    Converte o estado em memória de um evento em bytes (pickle)
+
+    Argumentos:
+        espelho (EspelhoPlanilha): última leitura da aba
+        indice (IndiceJogadores): registros indexados, junto com o ranking e a busca aproximada
+        jogos (list): jogos do evento, para descartar o snapshot se eles mudarem
+        linhas_lidas (int): linhas da aba cobertas pela última leitura
+
+    Observação:
+        - Deve ser chamado segurando a trava do SheetsBot, para que o estado seja consistente
+        - Guardar os índices prontos evita reconstruí-los ao iniciar
+    """
+    return pickle.dumps(
+        {
+            "versao": VERSAO_SNAPSHOT,
+            "salvo_em": time.time(),
+            "jogos": list(jogos),
+            "linhas_lidas": linhas_lidas,
+            "espelho": espelho,
+            "indice": indice,
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def gravar(caminho, dados):
+    """
+    Grava os bytes de serializar() em disco
+
+    Returns:
+        bool: True se o snapshot foi gravado
+    """
+    # Grava em um arquivo temporário e troca, para nunca deixar um snapshot pela metade
+    temporario = f"{caminho}.tmp"
+    try:
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Erro ao salvar o snapshot local da planilha: {e}")
+        return False
+    return True
+
+
+def ler(caminho):
+    """
+    Lê um snapshot gravado pelo bot
+
+    Returns:
+        dict: "espelho" (EspelhoPlanilha), "indice" (IndiceJogadores), "jogos", "linhas_lidas" e
+        "salvo_em" (timestamp); ou None se não houver um snapshot utilizável
+
+    Observação:
+        - O pickle só deve ser usado com arquivos gravados pelo próprio bot
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            dados = pickle.load(arquivo)
+    except Exception:
+        return None  # arquivo inexistente, corrompido ou de um formato desconhecido
+
+    if not isinstance(dados, dict) or dados.get("versao") != VERSAO_SNAPSHOT:
+        return None
+    return dados
+
+
+def exportar(dados, destino):
+    """
+    Exporta os jogadores de um snapshot como CSV ou Parquet (pela extensão do destino), sem acessar a planilha
+
+    Returns:
+        int: quantidade de jogadores exportados
+
+    Observação:
+        - Os registros vêm do índice, que inclui as pontuações registradas depois da última leitura
+        - O Parquet precisa do pandas e de um engine de Parquet (pyarrow ou fastparquet)
+    """
+    cabecalho = dados["espelho"].cabecalho
+    indice = dados["indice"]
+    linhas = [[indice.registros[linha].get(coluna, "") for coluna in cabecalho] for linha in sorted(indice.registros)]
+
+    if str(destino).lower().endswith(".parquet"):
+        import pandas as pd
+
+        tabela = pd.DataFrame([[None if v == "" else v for v in linha] for linha in linhas], columns=cabecalho)
+        for coluna in tabela.columns:
+            try:
+                tabela[coluna] = pd.to_numeric(tabela[coluna])
+            except (ValueError, TypeError):
+                tabela[coluna] = tabela[coluna].astype("string")
+        tabela.to_parquet(destino, index=False)
+    else:
+        with open(destino, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(cabecalho)
+            escritor.writerows(linhas)
+    return len(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta um snapshot local do bot como CSV ou Parquet")
+    parser.add_argument("snapshot", help="arquivo do snapshot (ex.: lib/snapshot_planilha.pkl)")
+    parser.add_argument("destino", help="arquivo de saída (.csv ou .parquet)")
+    args = parser.parse_args()
+
+    dados = ler(args.snapshot)
+    if dados is None:
+        raise SystemExit(f"Snapshot inexistente ou inválido: {args.snapshot}")
+    try:
+        quantidade = exportar(dados, args.destino)
+    except ImportError as e:
+        raise SystemExit(f"Para exportar em Parquet, instale o pyarrow (pip install pyarrow): {e}")
+    print(f"{quantidade} jogadores exportados para {args.destino}")
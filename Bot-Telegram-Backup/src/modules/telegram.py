@@ -1,7 +1,13 @@
+import functools
 import threading
 import time
+import signal
 import telebot
-from src.modules.sheets import SheetsBot
+from src.modules.eventos import RoteadorEventos
+from src.modules.despacho import Despachante
+from src.modules.indice import normalizar_nome
+from src.modules.metricas import metricas
+from src.modules.cache_respostas import CacheRespostas
 import requests
 import os
 from dotenv import load_dotenv
@@ -9,6 +15,49 @@ from pathlib import Path
 from datetime import datetime
 import pytz
 
+# Fuso e formato dos horários registrados na planilha (criados uma vez, e não a cada mensagem)
+TZ_BRASIL = pytz.timezone("America/Sao_Paulo")
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M:%S"
+
+# Textos fixos do /start e do /help, montados uma única vez
+MENSAGEM_START = (
+    "Falaa, meu fii! Eu sou o Bot do Semcomp! "
+    "Se quiser saber de algum comando, clique aqui -> /help\n"
+)
+
+MENSAGEM_HELP = (
+    "📌 **Bot da Semcomp - Comandos Principais**\n\n"
+    "⚠️ **ATENTE-SE ÀS VÍRGULAS**\n\n"
+    "🎯 **Comando /add** – Adicionar pontos de jogadores\n"
+    "Existem **3 formas de usar**:\n"
+    "1️⃣ `/add id, nome, contato, pontuação`\n"
+    "2️⃣ `/add nome, contato, pontuação`\n"
+    "3️⃣ `/add id, pontuação`\n\n"
+    "ℹ️ Observação: este comando **só aumenta a pontuação** se a nova for maior que a anterior. "
+    "Então, use sempre que quiser registrar a tentativa do jogador.\n"
+    "📋 Para registrar vários jogadores de uma vez, coloque um por linha após o `/add`.\n"
+    "🤔 Se já existir um jogador com nome **e** contato parecidos, o cadastro não é feito; "
+    "se for mesmo outra pessoa, use `/novo nome, contato, pontuação`. "
+    "Se só um dos dois for parecido, o jogador é cadastrado com um aviso.\n\n"
+    "🔍 **Comando /busca** – Consulta informações do jogador na planilha: `/busca id`, "
+    "`/busca nome, contato` ou só parte do nome/contato para ver os parecidos\n\n"
+    "🛠️ **Comando /ajuste** – Ajusta pontuação manualmente, caso algo dê errado\n\n"
+    "🏅 **Comando /ranking** – Mostra os melhores jogadores: `/ranking [jogo] [quantidade]`\n\n"
+    "📜 **Comando /historico** – Últimas tentativas de um jogador, com o monitor de cada uma: `/historico id [jogo]`\n\n"
+    "📊 **Comando /stats** – Métricas de desempenho do bot (somente administradores)"
+)
+
+
+@functools.lru_cache(maxsize=256)
+def formatar_data_hora(timestamp):
+    """Converte o horário de uma mensagem (timestamp Unix) para o horário de Brasília, como texto"""
+    return datetime.fromtimestamp(timestamp, tz=TZ_BRASIL).strftime(FORMATO_DATA_HORA)
+
+
+# Resposta para comandos de planilha em um chat que nenhum evento atende
+SEM_EVENTO = "⚠️ Este chat não está associado a nenhum evento. Verifique o arquivo de eventos do bot."
+
+
 class TelegramBot:
     def __init__(self):
         self.ativo = True
@@ -23,11 +72,24 @@ class TelegramBot:
         self.TOKEN = os.getenv("API_KEY_TELEGRAM")
         if not self.TOKEN:
             raise ValueError("API_KEY_TELEGRAM não encontrado. Verifique .env")
+        # Ids ou usernames (sem @) que podem usar os comandos de operação, como o /stats
+        self.admins = {
+            admin.strip().lstrip("@").lower()
+            for admin in os.getenv("ADMINS_TELEGRAM", "").split(",")
+            if admin.strip()
+        }
 
     def _init_bot(self):
         """Inicializa o bot e serviços auxiliares"""
-        self.bot = telebot.TeleBot(self.TOKEN)
-        self.sheets_bot = SheetsBot()
+        # O polling só recebe as mensagens; quem processa os comandos é o pool de workers
+        self.bot = telebot.TeleBot(self.TOKEN, threaded=False)
+        # Um SheetsBot por evento (planilha); cada chat é atendido pelo seu evento
+        self.eventos = RoteadorEventos()
+        self.cache_respostas = CacheRespostas(int(os.getenv("TAMANHO_CACHE_RESPOSTAS", 1024)))
+        self.despachante = Despachante(
+            num_workers=int(os.getenv("NUM_WORKERS", 4)),
+            tamanho_fila=int(os.getenv("TAMANHO_FILA_WORKERS", 100)),
+        )
         self.planilha_alocacao = None
         self.planilha_membros = None
 
@@ -36,40 +98,83 @@ class TelegramBot:
 
         @self.bot.message_handler(commands=["info_mensagem"])
         def start_handler(message):
-            self._handle_msg_info(message)
+            self.despachante.submeter(None, self._handle_msg_info, message)
 
         @self.bot.message_handler(commands=["start"])
         def start_handler(message):
-            self._handle_start(message)
+            self.despachante.submeter(None, self._handle_start, message)
 
         @self.bot.message_handler(commands=["help", "ajuda"])
         def help_handler(message):
-            self._handle_help(message)
+            self.despachante.submeter(None, self._handle_help, message)
 
         @self.bot.message_handler(commands=["add"])
         def add_handler(message):
-            self.sheets_bot.recarregar_dados()
-            self._handle_add(message)
+            self.despachante.submeter(self._chave_jogador(message), self._handle_add, message)
+
+        @self.bot.message_handler(commands=["novo"])
+        def novo_handler(message):
+            self.despachante.submeter(self._chave_jogador(message), self._handle_novo, message)
 
         @self.bot.message_handler(commands=["busca"])
         def busca_handler(message):
-            self.sheets_bot.recarregar_dados()
-            self._handle_busca(message)
+            self.despachante.submeter(None, self._handle_busca, message)
 
         @self.bot.message_handler(commands=["ajuste"])
         def ajuste_handler(message):
-            self.sheets_bot.recarregar_dados()
-            self._handle_ajuste(message)
+            self.despachante.submeter(self._chave_jogador(message), self._handle_ajuste, message)
+
+        @self.bot.message_handler(commands=["ranking"])
+        def ranking_handler(message):
+            self.despachante.submeter(None, self._handle_ranking, message)
+
+        @self.bot.message_handler(commands=["historico"])
+        def historico_handler(message):
+            self.despachante.submeter(None, self._handle_historico, message)
+
+        @self.bot.message_handler(commands=["stats"])
+        def stats_handler(message):
+            self.despachante.submeter(None, self._handle_stats, message)
+
+    def _executar_comando(self, comando, resposta, message):
+        """Gera a resposta do comando e a envia, medindo a duração de cada etapa"""
+        with metricas.medir(f"comando.{comando}"):
+            texto = resposta(message)
+        with metricas.medir("telegram.reply_to"):
+            self.bot.reply_to(message, texto)
+
+    def _chave_jogador(self, message):
+        """
+        Extrai do comando a chave usada para serializar os comandos de um mesmo jogador
+
+        Observação:
+            - Nos formatos com id a chave é o id, no formato "nome, contato, pontuação" é o nome
+        """
+        texto = (message.text or "").strip()
+        partes = texto.split(maxsplit=1)
+        if len(partes) < 2 or "\n" in partes[1].strip():
+            return None  # sem argumentos ou com vários jogadores (/add em lote)
+        partes = [p.strip() for p in partes[1].split(",") if p.strip()]
+        # O mesmo Id pode ser de jogadores diferentes em eventos diferentes
+        chat = message.chat.id if message.chat is not None else None
+        if len(partes) in (2, 4):
+            return f"{chat}:id:{partes[0]}"
+        if len(partes) == 3:
+            return f"{chat}:nome:{normalizar_nome(partes[0])}"
+        return None
+
+    def _sheets(self, message):
+        """Retorna o SheetsBot do evento que atende o chat da mensagem (ou None)"""
+        return self.eventos.para_chat(message.chat.id)
 
     def _handle_msg_info(self, message):
+        self._executar_comando("msg_info", self._resposta_msg_info, message)
+
+    def _resposta_msg_info(self, message):
         try:
             print(message.forum_topic_created.name)
             # Informações básicas da mensagem
-            tz_brasil = pytz.timezone("America/Sao_Paulo")
-            data_hora = datetime.fromtimestamp(message.date, tz=pytz.utc).astimezone(
-                tz_brasil
-            )
-            data_hora = data_hora.strftime("%d/%m/%Y %H:%M:%S")
+            data_hora = formatar_data_hora(message.date)
             debug_info = (
                 f"📝 *Informações da Mensagem* 📝\n"
                 f"• *Conteúdo*: `{message.text if message.text else 'Sem texto'}`\n"
@@ -111,86 +216,133 @@ class TelegramBot:
                         f"• *Posição*: {entity.offset}-{entity.offset + entity.length}\n"
                     )
 
-            # Envia a mensagem de debug formatada
-            self.bot.reply_to(message, debug_info)
+            # Retorna a mensagem de debug formatada
+            return debug_info
 
         except Exception as e:
-            self.bot.reply_to(message, f"⚠️ Erro ao gerar debug: {str(e)}")
+            return f"⚠️ Erro ao gerar debug: {str(e)}"
 
     def _handle_start(self, message):
         """Handler para o comando /start, imprimindo a mensagem de início do bot"""
-        welcome_msg = (
-            "Falaa, meu fii! Eu sou o Bot do Semcomp! "
-            "Se quiser saber de algum comando, clique aqui -> /help\n"
-        )
-        self.bot.reply_to(message, welcome_msg)
+        self._executar_comando("start", self._resposta_start, message)
+
+    def _resposta_start(self, message):
+        return MENSAGEM_START
 
     def _handle_help(self, message):
         """Handler para os comandos /help e /ajuda"""
-        help_msg = (
-            "📌 **Bot da Semcomp - Comandos Principais**\n\n"
-            "⚠️ **ATENTE-SE ÀS VÍRGULAS**\n\n"
-            "🎯 **Comando /add** – Adicionar pontos de jogadores\n"
-            "Existem **3 formas de usar**:\n"
-            "1️⃣ `/add id, nome, contato, pontuação`\n"
-            "2️⃣ `/add nome, contato, pontuação`\n"
-            "3️⃣ `/add id, pontuação`\n\n"
-            "ℹ️ Observação: este comando **só aumenta a pontuação** se a nova for maior que a anterior. "
-            "Então, use sempre que quiser registrar a tentativa do jogador.\n\n"
-            "🔍 **Comando /busca** – Consulta informações do jogador na planilha\n\n"
-            "🛠️ **Comando /ajuste** – Ajusta pontuação manualmente, caso algo dê errado"
-    )
-        self.bot.reply_to(message, help_msg)
+        self._executar_comando("help", self._resposta_help, message)
+
+    def _resposta_help(self, message):
+        return MENSAGEM_HELP
 
     def _handle_add(self, message):
+        self._executar_comando("add", self._resposta_add, message)
+
+    def _resposta_add(self, message, forcar_novo=False):
+        """Interpreta o comando /add e retorna o texto da resposta"""
         texto = message.text.strip()
         if texto.startswith("/add"):
             texto = texto[4:].strip()  # remove o '/add' e possíveis espaços
+        elif texto.startswith("/novo"):
+            texto = texto[5:].strip()
 
-        # Divide os argumentos por vírgula e remove espaços extras
-        partes = [p.strip() for p in texto.split(",") if p.strip()]
-        # print(partes)
-        if len(partes) == 3:
-            # /add nome, contato, pontuacao
-            nome, contato, pontuacao = partes
-            id_player = None
-
-        elif len(partes) == 2:
-            # /add id, pontuacao
-            id_player, pontuacao = partes
-            nome = contato = None
-
-        elif len(partes) == 4:
-            # /add id, nome, contato, pontuacao
-            id_player, nome, contato, pontuacao = partes
+        # Com várias linhas, cada linha é um registro e todas são processadas de uma vez
+        linhas = [linha.strip() for linha in texto.splitlines() if linha.strip()]
+        if len(linhas) > 1:
+            return self._resposta_add_lote(message, linhas, forcar_novo)
 
-        else:
-            self.bot.reply_to(
-                message,
+        argumentos = self._interpretar_add(texto)
+        if argumentos is None:
+            return (
                 "⚠️ Use o comando no formato:\n"
                 "`/add id, nome, contato, pontuação`\n"
                 "`/add nome, contato, pontuação`\n"
                 "`/add id, pontuação`"
             )
-            return
 
         jogo = message.reply_to_message.forum_topic_created.name
         monitor = message.from_user.username
 
-        tz_brasil = pytz.timezone("America/Sao_Paulo")
-        data_hora = datetime.fromtimestamp(message.date, tz=pytz.utc).astimezone(tz_brasil)
-        data_hora = data_hora.strftime("%d/%m/%Y %H:%M:%S")
+        data_hora = formatar_data_hora(message.date)
+
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+
+        id_player, nome, contato, pontuacao = argumentos
+        return sheets_bot.addPlayer(
+            id_player, nome, contato, jogo, pontuacao, monitor, data_hora, forcar_novo, message.message_id
+        )
+
+    def _handle_novo(self, message):
+        self._executar_comando("novo", self._resposta_novo, message)
+
+    def _resposta_novo(self, message):
+        """/novo: igual ao /add, mas cadastra o jogador mesmo que exista outro com nome e contato parecidos"""
+        return self._resposta_add(message, forcar_novo=True)
+
+    def _resposta_add_lote(self, message, linhas, forcar_novo=False):
+        """Interpreta um /add com um registro por linha e retorna o resumo do lote"""
+        entradas = []
+        for linha in linhas:
+            argumentos = self._interpretar_add(linha)
+            entradas.append((linha, *(argumentos or (None, None, None, None))))
+
+        jogo = message.reply_to_message.forum_topic_created.name
+        monitor = message.from_user.username
+
+        data_hora = formatar_data_hora(message.date)
 
-        resposta = self.sheets_bot.addPlayer(id_player, nome, contato, jogo, pontuacao, monitor, data_hora)
-        self.bot.reply_to(message,resposta)
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+        return sheets_bot.addPlayers(entradas, jogo, monitor, data_hora, forcar_novo, message.message_id)
+
+    def _interpretar_add(self, texto):
+        """
+        Interpreta os argumentos de um registro do /add
+
+        Returns:
+            tuple: (id, nome, contato, pontuacao), ou None se o formato for inválido
+        """
+        # Divide os argumentos por vírgula e remove espaços extras
+        partes = [p.strip() for p in texto.split(",") if p.strip()]
+        if len(partes) == 3:
+            # nome, contato, pontuacao
+            nome, contato, pontuacao = partes
+            return None, nome, contato, pontuacao
+        if len(partes) == 2:
+            # id, pontuacao
+            id_player, pontuacao = partes
+            return id_player, None, None, pontuacao
+        if len(partes) == 4:
+            # id, nome, contato, pontuacao
+            return tuple(partes)
+        return None
 
     def _handle_busca(self, message):
+        self._executar_comando("busca", self._resposta_busca, message)
+
+    def _resposta_busca(self, message):
+        """Interpreta o comando /busca e retorna o texto da resposta"""
         texto = message.text.strip()
         if texto.startswith("/busca"):
             texto = texto[6:].strip()  # remove o '/busca'
 
         partes = [p.strip() for p in texto.split(",") if p.strip()]
 
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+        if len(partes) == 1 and not partes[0].isdigit():
+            # Parte do nome ou do contato: lista os jogadores mais parecidos. A lista só muda quando
+            # algum registro muda, então a resposta fica guardada até a próxima alteração do índice
+            sheets_bot.recarregar_dados()
+            chave = (sheets_bot.evento["nome"], "parecidos", partes[0], sheets_bot.indice.versao)
+            return self.cache_respostas.obter(
+                chave, lambda: self._resposta_parecidos(partes[0], sheets_bot.buscar_parecidos(partes[0]))
+            )
         if len(partes) == 1:
             id_player = partes[0]
             nome = contato = None
@@ -198,32 +350,54 @@ class TelegramBot:
             nome, contato = partes
             id_player = None
         else:
-            self.bot.reply_to(message, "⚠️ Formato: `/busca id` ou `/busca nome, contato`")
-            return
+            return "⚠️ Formato: `/busca id`, `/busca nome ou contato` ou `/busca nome, contato`"
 
-        linha, jogador = self.sheets_bot.buscar_jogador(id_player, nome, contato)
+        linha, jogador, versao = sheets_bot.consultar_jogador(id_player, nome, contato)
+
+        if not jogador and nome:
+            parecidos = sheets_bot.buscar_parecidos(nome) + sheets_bot.buscar_parecidos(contato)
+            unicos = {linha: (linha, registro, nota) for linha, registro, nota in parecidos}
+            parecidos = sorted(unicos.values(), key=lambda p: (-p[2], p[0]))[:5]
+            if parecidos:
+                return "❌ Jogador não encontrado.\n\n" + self._resposta_parecidos(f"{nome}, {contato}", parecidos)
 
         if not jogador:
-            self.bot.reply_to(message, "❌ Jogador não encontrado.")
-            return
+            return "❌ Jogador não encontrado."
+
+        # Jogadores populares são buscados várias vezes seguidas; a resposta só é montada de novo
+        # quando o registro do jogador muda (nova pontuação ou nova leitura da planilha)
+        chave = (sheets_bot.evento["nome"], "jogador", linha, versao)
+        return self.cache_respostas.obter(chave, lambda: self._resposta_jogador(sheets_bot, linha, jogador))
 
+    def _resposta_jogador(self, sheets_bot, linha, jogador):
+        """Monta a resposta do /busca com os dados e pontuações de um jogador"""
         msg = (
             f"🏆 **Jogador encontrado na linha {linha}:**\n"
             f"🆔 ID: {jogador.get('Id')}\n"
             f"👤 Nome: {jogador.get('Nome')}\n"
             f"📞 Contato: {jogador.get('Contato (telegram/numero)')}\n\n"
             f"🎮 **Pontuações:**\n"
-            f"• Touhou: {jogador.get('Pontuação (Touhou)') or '0'} às {jogador.get('Timestamp (Touhou)') or '-'}\n"
-            f"• Guitar Hero: {jogador.get('Pontuação (Guitar Hero)') or '0'}  às {jogador.get('Timestamp (Guitar Hero)') or '-'}\n"
-            f"• Chicken: {jogador.get('Pontuação (Chicken)') or '0'} às {jogador.get('Timestamp (Chicken)') or '-'}\n"
-            f"• Tetris: {jogador.get('Pontuação (Tetris)') or '0'} às {jogador.get('Timestamp (Tetris)') or '-'}\n"
         )
+        for jogo, colunas in sheets_bot.jogos.items():
+            msg += f"• {jogo}: {jogador.get(colunas['pontos']) or '0'} às {jogador.get(colunas['timestamp']) or '-'}\n"
 
-        self.bot.reply_to(message, msg)
-
+        return msg
 
+    def _resposta_parecidos(self, consulta, parecidos):
+        """Lista os candidatos de uma busca aproximada"""
+        if not parecidos:
+            return f"❌ Nenhum jogador parecido com `{consulta}`."
+        msg = f"🔎 **Jogadores parecidos com `{consulta}`:**\n"
+        for _, jogador, _ in parecidos:
+            msg += f"• {jogador.get('Nome')} – {jogador.get('Contato (telegram/numero)')} (ID {jogador.get('Id')})\n"
+        msg += "\nUse `/busca id` para ver as pontuações."
+        return msg
 
     def _handle_ajuste(self, message):
+        self._executar_comando("ajuste", self._resposta_ajuste, message)
+
+    def _resposta_ajuste(self, message):
+        """Interpreta o comando /ajuste e retorna o texto da resposta"""
         texto = message.text.strip()
         if texto.startswith("/ajuste"):
             texto = texto[7:].strip()
@@ -239,34 +413,189 @@ class TelegramBot:
         elif len(partes) == 4:
             id_player, nome, contato, pontuacao = partes
         else:
-            self.bot.reply_to(message, "⚠️ Formato: `/ajuste id, pontuação` ou `/ajuste nome, contato, pontuação` ou `/ajuste id, nome, contato, pontuacao`")
-            return
+            return "⚠️ Formato: `/ajuste id, pontuação` ou `/ajuste nome, contato, pontuação` ou `/ajuste id, nome, contato, pontuacao`"
 
         jogo = message.reply_to_message.forum_topic_created.name
         monitor = message.from_user.username
 
-        tz_brasil = pytz.timezone("America/Sao_Paulo")
-        data_hora = datetime.fromtimestamp(message.date, tz=pytz.utc).astimezone(tz_brasil)
-        data_hora = data_hora.strftime("%d/%m/%Y %H:%M:%S")
+        data_hora = formatar_data_hora(message.date)
+
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+        return sheets_bot.ajustarPontuacao(
+            id_player, nome, contato, jogo, pontuacao, monitor, data_hora, message.message_id
+        )
 
-        resposta = self.sheets_bot.ajustarPontuacao(id_player, nome, contato, jogo, pontuacao, monitor, data_hora)
-        self.bot.reply_to(message, resposta)
+    def _handle_ranking(self, message):
+        self._executar_comando("ranking", self._resposta_ranking, message)
 
+    def _resposta_ranking(self, message):
+        """
+        Interpreta o comando /ranking [jogo] [N] e retorna o texto da resposta
+
+        Observação:
+            - Sem jogo, usa o jogo do tópico em que a mensagem foi enviada; fora de um tópico
+            de jogo, mostra o ranking de todos os jogos
+        """
+        texto = message.text.strip()
+        if texto.startswith("/ranking"):
+            texto = texto[8:].strip()
+
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+        jogos = sheets_bot.jogos
+
+        palavras = texto.split()
+        quantidade = 10
+        if palavras and palavras[-1].isdigit():
+            quantidade = max(1, min(int(palavras.pop()), 50))
+        nome_jogo = " ".join(palavras)
+
+        if nome_jogo:
+            selecionados = [jogo for jogo in jogos if jogo.lower() == nome_jogo.lower()]
+            if not selecionados:
+                return f"❌ Jogo `{nome_jogo}` não reconhecido. Jogos disponíveis: {', '.join(jogos)}"
+        else:
+            topico = getattr(message.reply_to_message, "forum_topic_created", None)
+            if topico is not None and topico.name in jogos:
+                selecionados = [topico.name]
+            else:
+                selecionados = list(jogos)
+
+        msg = ""
+        for jogo in selecionados:
+            msg += f"🏅 **Ranking – {jogo}**\n"
+            melhores = sheets_bot.consultar_ranking(jogo, quantidade)
+            if not melhores:
+                msg += "Nenhuma pontuação registrada ainda.\n"
+            for posicao, (jogador, pontos) in enumerate(melhores, start=1):
+                msg += f"{posicao}. {jogador.get('Nome')} (ID {jogador.get('Id')}) – {pontos}\n"
+            msg += "\n"
+        return msg.strip()
+
+    def _handle_historico(self, message):
+        self._executar_comando("historico", self._resposta_historico, message)
+
+    def _resposta_historico(self, message):
+        """
+        Interpreta o comando /historico id [jogo] e retorna as últimas tentativas de pontuação do jogador
+
+        Observação:
+            - A consulta é feita no histórico local, sem acessar a planilha
+        """
+        texto = message.text.strip()
+        if texto.startswith("/historico"):
+            texto = texto[10:].strip()
+
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO
+
+        partes = texto.replace(",", " ").split(maxsplit=1)
+        if not partes:
+            return "⚠️ Formato: `/historico id` ou `/historico id jogo`"
+        id_player = partes[0]
+        jogo = None
+        if len(partes) == 2:
+            selecionados = [j for j in sheets_bot.jogos if j.lower() == partes[1].strip().lower()]
+            if not selecionados:
+                return f"❌ Jogo `{partes[1].strip()}` não reconhecido. Jogos disponíveis: {', '.join(sheets_bot.jogos)}"
+            jogo = selecionados[0]
+
+        tentativas = sheets_bot.auditoria.consultar(id_player, jogo)
+        if not tentativas:
+            return f"📜 Nenhuma tentativa registrada para o ID {id_player}{f' em {jogo}' if jogo else ''}."
+
+        def pontos(valor):
+            return "-" if valor is None else f"{valor:g}"
+
+        nome = next((tentativa["nome"] for tentativa in tentativas if tentativa["nome"]), None)
+        titulo = f"{nome} (ID {id_player})" if nome else f"ID {id_player}"
+        msg = f"📜 **Histórico – {titulo}{f' – {jogo}' if jogo else ''}**\n"
+        for tentativa in tentativas:
+            msg += (
+                f"• {tentativa['horario']} · {tentativa['jogo']} · /{tentativa['comando']} "
+                f"{pontos(tentativa['pontos_antigos'])} → {pontos(tentativa['pontos_novos'])} · "
+                f"@{tentativa['monitor']} · {tentativa['situacao']}\n"
+            )
+        return msg
+
+    def _handle_stats(self, message):
+        self._executar_comando("stats", self._resposta_stats, message)
+
+    def _eh_admin(self, message):
+        usuario = message.from_user
+        if usuario is None:
+            return False
+        return str(usuario.id) in self.admins or (usuario.username or "").lower() in self.admins
+
+    def _resposta_stats(self, message):
+        """Retorna as métricas de latência e o estado das filas (somente administradores)"""
+        if not self._eh_admin(message):
+            return "⛔ Comando restrito aos administradores do bot."
+
+        msg = metricas.texto_stats()
+        for sheets_bot in self.eventos:
+            msg += (
+                f"\n📝 **Planilha – {sheets_bot.evento['nome']}**\n"
+                f"• Escritas pendentes na fila: {sheets_bot.fila.pendentes()}\n"
+                f"• Modo offline: {'Sim' if sheets_bot.offline else 'Não'}\n"
+                f"• Tentativas do histórico a enviar: {sheets_bot.auditoria.pendentes()}\n"
+            )
+        despachante = getattr(self, "despachante", None)
+        if despachante is not None:
+            estatisticas = despachante.estatisticas()
+            msg += (
+                f"\n⚙️ **Workers**\n"
+                f"• Processados: {estatisticas['processados']} de {estatisticas['submetidos']} "
+                f"({estatisticas['erros']} erros)\n"
+                f"• Esperas por fila cheia: {estatisticas['esperas_fila_cheia']}\n"
+                f"• Profundidade das filas: {estatisticas['profundidade_atual']} "
+                f"(máxima {estatisticas['profundidade_maxima']})\n"
+            )
+        return msg
+
+    def _iniciar_metricas(self):
+        """Exporta as métricas no formato do Prometheus, se configurado no .env"""
+        metricas.iniciar_exportacao(
+            arquivo=os.getenv("METRICAS_ARQUIVO"),
+            porta=os.getenv("METRICAS_PORTA"),
+            intervalo=float(os.getenv("METRICAS_INTERVALO", 15)),
+            host=os.getenv("METRICAS_HOST", "127.0.0.1"),
+        )
 
     def start(self):
         """Inicia o bot e o monitor de comandos"""
+        self._iniciar_metricas()
         # threading.Thread(target=self._monitorar_comando, daemon=True).start()
+        try:
+            signal.signal(signal.SIGTERM, lambda *_: self.parar())
+        except ValueError:
+            pass  # só é possível registrar sinais na thread principal
 
-        while self.ativo:
-            try:
-                print("Bot está ativo!")
-                self.bot.polling()
-            except requests.exceptions.ReadTimeout:
-                print("Erro de timeout. Reiniciando...")
-                time.sleep(5)
-            except Exception as e:
-                print(f"Erro inesperado: {e}. Reiniciando...")
-                time.sleep(5)
+        try:
+            while self.ativo:
+                try:
+                    print("Bot está ativo!")
+                    self.bot.polling()
+                except requests.exceptions.ReadTimeout:
+                    print("Erro de timeout. Reiniciando...")
+                    time.sleep(5)
+                except Exception as e:
+                    print(f"Erro inesperado: {e}. Reiniciando...")
+                    time.sleep(5)
+        finally:
+            # Garante que nenhuma pontuação pendente na fila de escrita seja perdida
+            print("Finalizando comandos em andamento e enviando escritas pendentes para a planilha...")
+            self.despachante.encerrar()
+            self.eventos.encerrar()
+
+    def parar(self):
+        """Encerra o polling, fazendo com que start() envie as escritas pendentes e retorne"""
+        self.ativo = False
+        self.bot.stop_polling()
 
     # def _monitorar_comando(self):
     #     """Monitora o terminal por comandos de parada"""
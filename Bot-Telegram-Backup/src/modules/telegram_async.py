@@ -0,0 +1,262 @@
+import asyncio
+import os
+import signal
+from pathlib import Path
+
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from src.modules.telegram import TelegramBot, SEM_EVENTO
+from src.modules.eventos import RoteadorEventos
+from src.modules.sheets_async import ClienteSheetsAsync
+from src.modules.cliente_sheets import BaldeTokens
+from src.modules.fila_escrita import FilaEscrita
+from src.modules.metricas import metricas
+from src.modules.cache_respostas import CacheRespostas
+
+##########################################################
+# VERSÃO ASSÍNCRONA (ASYNCIO) DO BOT DO TELEGRAM         #
+##########################################################
+
+class _EstadoEvento:
+    def __init__(self, sheets_bot, cliente):
+        """Cliente da planilha, travas e tarefa de envio de um evento (criados dentro do event loop)"""
+        self.sheets_bot = sheets_bot
+        self.cliente = cliente
+        self.trava_recarga = asyncio.Lock()
+        self.trava_envio = asyncio.Lock()
+        self.evento_envio = asyncio.Event()
+        self.tarefa_envio = None
+        self.tarefa_snapshot = None
+        self.tarefa_reconciliacao = None
+
+
+class TelegramBotAsync(TelegramBot):
+    """
+    Mesmo bot do TelegramBot (mesmos comandos e respostas), mas rodando em asyncio
+
+    Observação:
+        - As esperas de rede (Telegram e Google Sheets) de vários comandos acontecem ao
+        mesmo tempo no event loop, em vez de uma depois da outra
+        - O SheetsBot roda em modo assíncrono: o estado em memória continua nele, mas as
+        leituras e o envio da fila de escrita são feitos aqui pelo ClienteSheetsAsync
+        - Cada evento tem o seu ClienteSheetsAsync, travas e tarefa de envio, então a recarga
+        ou o envio de uma planilha não segura os comandos de outra
+        - As respostas e a aplicação das leituras rodam em threads (asyncio.to_thread), pois
+        seguram a trava do SheetsBot e gravam em disco (fsync do diário e commit do histórico),
+        o que pararia o event loop e todos os comandos em andamento
+    """
+
+    def _init_bot(self):
+        """Inicializa o bot assíncrono e serviços auxiliares"""
+        asyncio_helper.REQUEST_TIMEOUT = int(os.getenv("TIMEOUT_TELEGRAM", 30))
+        self.bot = AsyncTeleBot(self.TOKEN)
+        self.eventos = RoteadorEventos(assincrono=True)
+        self.cache_respostas = CacheRespostas(int(os.getenv("TAMANHO_CACHE_RESPOSTAS", 1024)))
+        self.planilha_alocacao = None
+        self.planilha_membros = None
+        # Criados dentro do event loop, em _executar()
+        self._estados = {}  # nome do evento -> _EstadoEvento
+        self._travas_jogador = {}
+        self._tarefa_polling = None
+
+    def _register_handlers(self):
+        """Registra os handlers, reaproveitando a interpretação dos comandos do TelegramBot"""
+        handlers = [
+            (["info_mensagem"], self._resposta_msg_info, False, False),
+            (["start"], self._resposta_start, False, False),
+            (["help", "ajuda"], self._resposta_help, False, False),
+            (["add"], self._resposta_add, True, True),
+            (["novo"], self._resposta_novo, True, True),
+            (["busca"], self._resposta_busca, True, False),
+            (["ajuste"], self._resposta_ajuste, True, True),
+            (["ranking"], self._resposta_ranking, True, False),
+            (["historico"], self._resposta_historico, False, False),
+            (["stats"], self._resposta_stats, False, False),
+        ]
+        for comandos, resposta, usa_planilha, por_jogador in handlers:
+            self.bot.register_message_handler(
+                self._criar_handler(comandos[0], resposta, usa_planilha, por_jogador),
+                commands=comandos,
+            )
+
+    def _criar_handler(self, comando, resposta, usa_planilha, por_jogador):
+        async def handler(message):
+            chave = self._chave_jogador(message) if por_jogador else None
+            with metricas.medir(f"comando.{comando}"):
+                if chave is None:
+                    texto = await self._responder(message, resposta, usa_planilha)
+                else:
+                    # Comandos do mesmo jogador são executados em ordem, um de cada vez
+                    trava = self._travas_jogador.setdefault(chave, asyncio.Lock())
+                    async with trava:
+                        texto = await self._responder(message, resposta, usa_planilha)
+            with metricas.medir("telegram.reply_to"):
+                await self.bot.reply_to(message, texto)
+        return handler
+
+    async def _responder(self, message, resposta, usa_planilha):
+        sheets_bot = self._sheets(message)
+        if sheets_bot is None:
+            return SEM_EVENTO if usa_planilha else await asyncio.to_thread(resposta, message)
+        estado = self._estados[sheets_bot.evento["nome"]]
+        if usa_planilha:
+            await self._garantir_dados(estado)
+        texto = await asyncio.to_thread(resposta, message)
+        if sheets_bot.fila.pendentes() >= sheets_bot.fila.limite:
+            estado.evento_envio.set()
+        return texto
+
+    async def _garantir_dados(self, estado, forcar=False):
+        """Recarrega a planilha do evento (de forma assíncrona) se o cache em memória expirou ou se `forcar`"""
+        sheets_bot = estado.sheets_bot
+        if not forcar and not sheets_bot.cache_expirado():
+            return
+        async with estado.trava_recarga:
+            if not forcar and not sheets_bot.cache_expirado():
+                return
+            # Nenhum lote sai enquanto a leitura é feita, assim toda escrita ou já está na leitura
+            # ou ainda está na fila (e é reaplicada sobre ela em aplicar_valores)
+            async with estado.trava_envio:
+                intervalo = sheets_bot.intervalo_novas_linhas()
+                try:
+                    if intervalo is not None:
+                        # A coluna Id vem junto com as linhas novas, para conferir se as já lidas mudaram de lugar
+                        ids, valores = await estado.cliente.batch_get([intervalo[2], intervalo[1]])
+                        if not await asyncio.to_thread(sheets_bot.linhas_conferem, ids):
+                            intervalo = None
+                    if intervalo is None:
+                        valores = await estado.cliente.get_all_values()
+                except Exception as e:
+                    await asyncio.to_thread(sheets_bot.usar_offline, e)
+                    return
+                if intervalo is None:
+                    await asyncio.to_thread(sheets_bot.aplicar_valores, valores)
+                else:
+                    await asyncio.to_thread(sheets_bot.aplicar_novas_linhas, intervalo[0], valores)
+        estado.evento_envio.set()
+
+    def _leitura_forcada(self, estado):
+        """
+        Função que o SheetsBot chama para forçar uma leitura (ex.: antes de cadastrar um jogador)
+
+        Observação:
+            - Ela é chamada de dentro das respostas, que rodam em outra thread (ver _responder), e
+            espera a leitura feita no event loop
+        """
+        loop = asyncio.get_running_loop()
+        return lambda: asyncio.run_coroutine_threadsafe(self._garantir_dados(estado, forcar=True), loop).result()
+
+    async def _enviar_escritas(self, estado):
+        """Envia as escritas pendentes da fila do evento em lote, devolvendo-as à fila em caso de erro"""
+        async with estado.trava_envio:
+            fila = estado.sheets_bot.fila
+            linhas, celulas = fila.retirar()
+            if not linhas and not celulas:
+                return
+            try:
+                if linhas:
+                    resposta = await estado.cliente.append_rows(linhas, value_input_option="RAW")
+                    await asyncio.to_thread(fila.registrar_anexo, resposta, linhas)
+                    linhas = []
+                # As linhas das células só são resolvidas agora, depois de as linhas novas terem sido anexadas
+                resolvidas = await asyncio.to_thread(fila.resolver_linhas, celulas)
+                if resolvidas:
+                    await estado.cliente.batch_update(
+                        FilaEscrita.dados_batch_update(resolvidas),
+                        value_input_option="USER_ENTERED",
+                    )
+            except Exception as e:
+                fila.devolver(linhas, celulas)
+                if fila.ao_falhar is not None:
+                    fila.ao_falhar(e)
+                raise
+            fila.confirmar_envio()
+
+    async def _enviar_periodicamente(self, estado):
+        while True:
+            try:
+                await asyncio.wait_for(estado.evento_envio.wait(), timeout=estado.sheets_bot.fila.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            estado.evento_envio.clear()
+            try:
+                await self._enviar_escritas(estado)
+            except Exception as e:
+                print(f"Erro ao enviar escritas para a planilha: {e}. Tentando novamente...")
+
+    async def _gravar_snapshot_periodicamente(self, estado):
+        while True:
+            await asyncio.sleep(estado.sheets_bot.intervalo_snapshot)
+            # A serialização roda em outra thread para não parar o event loop
+            await asyncio.to_thread(estado.sheets_bot.gravar_snapshot)
+
+    async def _executar(self):
+        creds_path = Path(__file__).parent.parent.parent / "lib" / "credentials.json"
+        # A cota da API é da conta de serviço, então é compartilhada entre os eventos
+        leituras = BaldeTokens(int(os.getenv("COTA_LEITURAS_MINUTO", 60)))
+        escritas = BaldeTokens(int(os.getenv("COTA_ESCRITAS_MINUTO", 60)))
+        for sheets_bot in self.eventos:
+            cliente = ClienteSheetsAsync(
+                creds_path,
+                sheets_bot.evento["planilha"],
+                sheets_bot.evento["aba"],
+                timeout=float(os.getenv("TIMEOUT_SHEETS", 10)),
+                leituras=leituras,
+                escritas=escritas,
+            )
+            estado = _EstadoEvento(sheets_bot, cliente)
+            self._estados[sheets_bot.evento["nome"]] = estado
+            sheets_bot.ler_agora = self._leitura_forcada(estado)
+
+        # Eventos carregados de um snapshot recente já respondem; a planilha é conferida em segundo plano
+        await asyncio.gather(*(
+            self._garantir_dados(estado) for estado in self._estados.values()
+            if not estado.sheets_bot.iniciado_do_snapshot
+        ))
+        for estado in self._estados.values():
+            if estado.sheets_bot.iniciado_do_snapshot:
+                estado.tarefa_reconciliacao = asyncio.create_task(self._garantir_dados(estado, forcar=True))
+            estado.tarefa_envio = asyncio.create_task(self._enviar_periodicamente(estado))
+            if estado.sheets_bot.intervalo_snapshot > 0:
+                estado.tarefa_snapshot = asyncio.create_task(self._gravar_snapshot_periodicamente(estado))
+        self._tarefa_polling = asyncio.create_task(
+            self.bot.infinity_polling(timeout=20, request_timeout=int(os.getenv("TIMEOUT_TELEGRAM", 30)))
+        )
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.parar)
+        except (NotImplementedError, RuntimeError):
+            pass  # sinais não suportados nesta plataforma
+
+        print("Bot (asyncio) está ativo!")
+        try:
+            await self._tarefa_polling
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Garante que nenhuma pontuação pendente na fila de escrita seja perdida
+            print("Enviando escritas pendentes para a planilha...")
+            for estado in self._estados.values():
+                estado.tarefa_envio.cancel()
+                if estado.tarefa_snapshot is not None:
+                    estado.tarefa_snapshot.cancel()
+                try:
+                    await self._enviar_escritas(estado)
+                except Exception as e:
+                    print(f"Erro ao enviar escritas de '{estado.sheets_bot.evento['nome']}': {e}. "
+                          "Elas serão reenviadas a partir do diário ao reiniciar")
+                # Grava o snapshot e envia o histórico (a fila já foi enviada acima)
+                estado.sheets_bot.encerrar()
+                await estado.cliente.fechar()
+            await self.bot.close_session()
+
+    def start(self):
+        """Inicia o bot no event loop do asyncio"""
+        self._iniciar_metricas()
+        asyncio.run(self._executar())
+
+    def parar(self):
+        """Encerra o polling, fazendo com que start() envie as escritas pendentes e retorne"""
+        self.ativo = False
+        if self._tarefa_polling is not None:
+            self._tarefa_polling.cancel()
@@ -0,0 +1,136 @@
+import hmac
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot import types
+
+from src.modules.telegram import TelegramBot
+from src.modules.metricas import metricas
+
+##########################################################
+# MODO WEBHOOK: O TELEGRAM ENVIA AS MENSAGENS AO BOT     #
+##########################################################
+
+# Tamanho máximo aceito para o corpo de um update (bytes)
+TAMANHO_MAXIMO_UPDATE = 1024 * 1024
+
+
+class TelegramBotWebhook(TelegramBot):
+    """
+    Mesmo bot do TelegramBot, mas recebendo as mensagens por webhook em vez de long polling
+
+    Observação:
+        - Um servidor HTTP local recebe cada update (POST com o JSON do Telegram), confere o
+        token secreto e entrega o update aos mesmos handlers, que só o repassam ao pool de workers.
+        A resposta 200 sai logo em seguida, sem esperar o comando ser processado
+        - A concorrência fica limitada pelo pool (NUM_WORKERS e TAMANHO_FILA_WORKERS): com as
+        filas cheias, o servidor espera antes de responder, e o Telegram segura os próximos updates
+        - Pode ser testado localmente enviando um update gravado:
+            curl -X POST localhost:8443/telegram -H "X-Telegram-Bot-Api-Secret-Token: <segredo>" -d @update.json
+    """
+
+    def _init_bot(self):
+        # Sem o segredo, qualquer um que alcançasse a porta poderia enviar updates (e registrar pontuações)
+        self.segredo = os.getenv("WEBHOOK_SEGREDO", "")
+        if not self.segredo:
+            raise ValueError("Defina WEBHOOK_SEGREDO no .env para usar o modo webhook")
+        super()._init_bot()
+        self.caminho = os.getenv("WEBHOOK_CAMINHO", "/telegram")
+        self.servidor = None
+        self._parado = threading.Event()
+
+    def processar_update(self, corpo):
+        """
+        Entrega o JSON de um update aos handlers registrados
+
+        Returns:
+            bool: False se o corpo não for um update válido
+        """
+        try:
+            update = types.Update.de_json(corpo.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError):
+            return False
+        if update is None:
+            return False
+        with metricas.medir("webhook.update"):
+            self.bot.process_new_updates([update])
+        return True
+
+    def _criar_servidor(self, host, porta):
+        bot = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _responder(self, status, corpo=b""):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                # Verificação de saúde (ex.: proxy reverso ou orquestrador)
+                if self.path == "/saude":
+                    self._responder(200, b"ok")
+                else:
+                    self._responder(404)
+
+            def do_POST(self):
+                if self.path != bot.caminho:
+                    self._responder(404)
+                    return
+                token = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+                if not hmac.compare_digest(token, bot.segredo):
+                    metricas.contar("webhook.token_invalido")
+                    self._responder(403)
+                    return
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                if tamanho <= 0 or tamanho > TAMANHO_MAXIMO_UPDATE:
+                    self._responder(413 if tamanho > 0 else 400)
+                    return
+                if not bot.processar_update(self.rfile.read(tamanho)):
+                    self._responder(400)
+                    return
+                self._responder(200)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, porta), Handler)
+        servidor.daemon_threads = True
+        return servidor
+
+    def start(self):
+        """Inicia o servidor do webhook e, se WEBHOOK_URL estiver definido, registra o webhook no Telegram"""
+        self._iniciar_metricas()
+        host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+        porta = int(os.getenv("WEBHOOK_PORTA", 8443))
+        self.servidor = self._criar_servidor(host, porta)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+        url = os.getenv("WEBHOOK_URL")
+        if url:
+            self.bot.set_webhook(url=url, secret_token=self.segredo)
+        try:
+            signal.signal(signal.SIGTERM, lambda *_: self.parar())
+        except ValueError:
+            pass  # só é possível registrar sinais na thread principal
+
+        print(f"Bot (webhook) está ativo em {host}:{porta}{self.caminho}!")
+        try:
+            while not self._parado.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Garante que nenhuma pontuação pendente na fila de escrita seja perdida
+            print("Finalizando comandos em andamento e enviando escritas pendentes para a planilha...")
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.despachante.encerrar()
+            self.eventos.encerrar()
+
+    def parar(self):
+        """Encerra o servidor, fazendo com que start() envie as escritas pendentes e retorne"""
+        self.ativo = False
+        self._parado.set()